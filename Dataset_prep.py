@@ -1,14 +1,510 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
 import pandas as pd
 import numpy as np
+from pandas.api.types import union_categoricals
+
+from aggregates import CUBE_DIMENSIONS, MedalCube, country_profiles, medal_cube
+from frame_cache import frame_version, key_versions, per_frame
+from indexes import row_indexes
+from search import name_search
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - the cache is optional
+    feather = None
+
+SOURCE_PATH = 'medals.csv'
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country_aliases.csv')
+CACHE_DIR = '.cache'
+
+# Bump whenever prepare() or the cache layout changes so stale caches are rebuilt
+CACHE_VERSION = 4
+
+# Parts appended to the cache by append_games() before it is rewritten as one file
+MAX_CACHE_PARTS = 16
+
+DROP_COLUMNS = ['country_code', 'country_3_letter_code', 'participant_title', 'athlete_url']
+
+# Low-cardinality columns stored as integer-coded categories
+CATEGORICAL_COLUMNS = [
+    'country_name',
+    'discipline_title',
+    'slug_game',
+    'event_title',
+    'event_gender',
+    'medal_type',
+    'participant_type',
+]
+
+# Sources larger than this are streamed into aggregates instead of loaded whole
+STREAMING_THRESHOLD = 1 << 30
+
+# Rows read per chunk when streaming
+CHUNK_SIZE = 1_000_000
+
+# Columns whose values scope cached results (see result_cache.memoize)
+SLICE_COLUMNS = ['country_name', 'discipline_title', 'slug_game', 'athlete_full_name']
+
+_df = None
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def country_aliases():
+    """
+    Return the alias table: historical or alternative delegation name to its current country name.
+    """
+    aliases = pd.read_csv(ALIASES_PATH, keep_default_na=False)
+    return dict(zip(aliases['alias'], aliases['country_name']))
+
+
+@per_frame
+def merged_countries(df):
+    """
+    Return the raw country names merged into each harmonized name of a frame.
+
+    Frames not built by prepare() or stream_dataset() have nothing recorded.
+
+    Returns:
+        dict: Harmonized name to the sorted list of raw names mapped onto it.
+    """
+    return {}
+
+
+def harmonize_countries(column):
+    """
+    Map historical delegation names onto their current country using the alias table.
+
+    The aliases are applied to the distinct names only and the rows are then
+    recoded in one pass over the category codes, so the cost does not grow with
+    the size of the alias table.
+
+    Parameters:
+        column (pandas.Series): The raw country names.
+
+    Returns:
+        tuple: The harmonized names as a categorical with sorted categories, and a dict
+        of harmonized name to the raw names merged into it.
+    """
+    raw = column.astype('category').cat
+    aliases = country_aliases()
+    names = raw.categories.map(lambda name: aliases.get(name, name))
+    categories = pd.Index(np.sort(names.unique()))
+
+    # Code -1 (missing) indexes the trailing -1 and stays missing
+    remap = np.append(categories.get_indexer(names), -1)
+    harmonized = pd.Series(pd.Categorical.from_codes(remap[raw.codes.to_numpy()], categories), index=column.index, name=column.name)
+
+    merged = {}
+    for name, target in zip(raw.categories, names):
+        if name != target:
+            merged.setdefault(target, []).append(name)
+    return harmonized, {target: sorted(raw_names) for target, raw_names in sorted(merged.items())}
+
+
+def prepare(df):
+    """
+    Normalize a raw medals frame: drop unused columns, harmonize country names and
+    dictionary-encode the low-cardinality columns.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame as read from the source CSV.
+
+    Returns:
+        pandas.DataFrame: The normalized DataFrame.
+    """
+    df = df.drop(columns=DROP_COLUMNS)
+    df['country_name'], merged = harmonize_countries(df['country_name'])
+    df = encode_categories(df)
+    merged_countries.set(df, merged)
+    return df
+
+
+def encode_categories(df):
+    """
+    Convert CATEGORICAL_COLUMNS to categoricals with sorted categories.
+
+    Sorted categories keep code order equal to label order, so groupby results
+    come out in the same order as they did on the plain string columns.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame to encode.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with categorical columns.
+    """
+    for column in CATEGORICAL_COLUMNS:
+        categories = np.sort(df[column].dropna().unique())
+        df[column] = pd.Categorical(df[column], categories=categories)
+    return df
+
+
+def _file_hash(path, start=0, end=None):
+    # Hash the source (or a byte range of it) in blocks so large files are never held in memory
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = float('inf') if end is None else end - start
+        while remaining > 0:
+            block = file.read(int(min(1 << 20, remaining)))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _cache_paths(path):
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f'{stem}.feather'), os.path.join(cache_dir, f'{stem}.json')
+
+
+def _source_matches(path, meta):
+    # The source must still be the bytes of every cached part, in order
+    if os.path.getsize(path) != meta['parts'][-1]['end']:
+        return False
+    start = 0
+    for part in meta['parts']:
+        if _file_hash(path, start, part['end']) != part['sha256']:
+            return False
+        start = part['end']
+    return True
+
+
+def _read_cache(path):
+    """
+    Return the cached frame and its metadata, or (None, None) when the cache is missing or stale.
+
+    The cache is a base file plus one part per append_games() call, listed in the
+    metadata with the source bytes each one was parsed from. It is trusted when the
+    source mtime and size are unchanged; otherwise the source is rehashed part by
+    part, so a touched but identical file still hits the cache.
+    """
+    data_path, meta_path = _cache_paths(path)
+    if feather is None or not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+
+    with open(meta_path) as file:
+        meta = json.load(file)
+    if meta.get('version') != CACHE_VERSION:
+        return None, None
+
+    stat = os.stat(path)
+    if (meta['mtime_ns'], meta['size']) != (stat.st_mtime_ns, stat.st_size):
+        if not _source_matches(path, meta):
+            return None, None
+        meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        try:
+            _replace_file(meta_path, lambda file: file.write(json.dumps(meta).encode()))
+        except OSError:
+            pass
+
+    # The memory-mapped Arrow tables are not copied onto the heap; to_pandas() makes the one copy
+    cache_dir = os.path.dirname(data_path)
+    try:
+        parts = [feather.read_table(os.path.join(cache_dir, part['file']), memory_map=True).to_pandas() for part in meta['parts']]
+    except OSError:
+        # A concurrent rewrite removed a part
+        return None, None
+    return _concat_frames(parts), meta
+
+
+def _replace_file(path, write):
+    # Write to a unique temporary file next to path, then rename it over path,
+    # so concurrent readers and writers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _source_meta(path, df):
+    stat = os.stat(path)
+    sha256 = _file_hash(path)
+    return {
+        'version': CACHE_VERSION,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'frame_version': f'{CACHE_VERSION}-{sha256[:16]}',
+        'parts': [{'file': os.path.basename(_cache_paths(path)[0]), 'end': stat.st_size, 'sha256': sha256}],
+        'merged_countries': merged_countries(df),
+    }
+
+
+def _write_cache(df, path):
+    meta = _source_meta(path, df)
+    if feather is None:
+        return meta
+    data_path, meta_path = _cache_paths(path)
+
+    # The cache is an optimization: a read-only or full disk only costs the next start a parse
+    try:
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        _replace_file(data_path, lambda file: feather.write_feather(df, file, compression='uncompressed'))
+        _replace_file(meta_path, lambda file: file.write(json.dumps(meta).encode()))
+
+        # The base file now holds every row, so the parts appended before are stale
+        for part_path in glob.glob(f'{glob.escape(os.path.splitext(data_path)[0])}.*.feather'):
+            os.unlink(part_path)
+    except OSError:
+        pass
+    return meta
+
+
+def _append_cache(df, new, path, before):
+    """
+    Add the rows of one append_games() call to the cache as a new part.
+
+    Only the new rows are written and only the source bytes appended for them are
+    hashed. The whole cache is rewritten instead when it did not match the source
+    before the append, or already has MAX_CACHE_PARTS parts.
+
+    Parameters:
+        df (pandas.DataFrame): The combined frame.
+        new (pandas.DataFrame): Its rows that were just appended to the source.
+        path (str): Path to the source CSV file.
+        before (os.stat_result): The source's stat before the rows were appended.
+    """
+    if feather is None:
+        return
+    data_path, meta_path = _cache_paths(path)
+    try:
+        with open(meta_path) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        meta = {}
+    if meta.get('version') != CACHE_VERSION or (meta['mtime_ns'], meta['size']) != (before.st_mtime_ns, before.st_size) \
+            or len(meta['parts']) >= MAX_CACHE_PARTS:
+        _write_cache(df, path)
+        return
+
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    part_file = f"{stem}.{len(meta['parts'])}.feather"
+    stat = os.stat(path)
+    meta['parts'].append({'file': part_file, 'end': stat.st_size, 'sha256': _file_hash(path, before.st_size)})
+    meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, frame_version=frame_version(df), merged_countries=merged_countries(df))
+    try:
+        new = new.reset_index(drop=True)
+        _replace_file(os.path.join(os.path.dirname(data_path), part_file), lambda file: feather.write_feather(new, file, compression='uncompressed'))
+        _replace_file(meta_path, lambda file: file.write(json.dumps(meta).encode()))
+    except OSError:
+        pass
+
+
+def load_dataset(path=SOURCE_PATH, use_cache=True):
+    """
+    Load the normalized medals dataset, going through the columnar cache when possible.
+
+    Parameters:
+        path (str): Path to the source CSV file.
+        use_cache (bool): Whether to read and refresh the on-disk cache.
+
+    Returns:
+        pandas.DataFrame: The normalized DataFrame.
+    """
+    df, meta = _read_cache(path) if use_cache else (None, None)
+    if df is None:
+        df = prepare(pd.read_csv(path))
+        meta = _write_cache(df, path) if use_cache else _source_meta(path, df)
+
+    # Version the frame by its source contents so cached results stay keyed correctly
+    frame_version.set(df, meta['frame_version'])
+    merged_countries.set(df, meta['merged_countries'])
+    return df
+
+
+def stream_dataset(path=SOURCE_PATH, chunksize=CHUNK_SIZE):
+    """
+    Aggregate a source too large for memory, one chunk at a time.
+
+    Only the cube dimensions are parsed, the country names of every chunk are
+    harmonized, and each chunk's cube is folded into a running total, so memory
+    is bounded by the chunk size and the number of distinct cells, not the rows.
+
+    Parameters:
+        path (str): Path to the source CSV file.
+        chunksize (int): The number of rows read at a time.
+
+    Returns:
+        pandas.DataFrame: The cube cells (see MedalCube.to_frame). Its cube is registered,
+        so medal_cube() and the pages built on it work on this frame as on the full one.
+    """
+    cube = None
+    merged = {}
+    for chunk in pd.read_csv(path, usecols=CUBE_DIMENSIONS, chunksize=chunksize):
+        chunk['country_name'], chunk_merged = harmonize_countries(chunk['country_name'])
+        for target, names in chunk_merged.items():
+            merged[target] = sorted(set(merged.get(target, [])) | set(names))
+        chunk_cube = MedalCube.from_frame(chunk)
+        cube = chunk_cube if cube is None else MedalCube.combine([cube, chunk_cube])
+
+    summary = cube.to_frame()
+    medal_cube.set(summary, cube)
+    merged_countries.set(summary, dict(sorted(merged.items())))
+
+    # Hashing a multi-GB source on every start is too slow, so version it by its stat
+    stat = os.stat(path)
+    frame_version.set(summary, f'{CACHE_VERSION}-stream-{stat.st_mtime_ns}-{stat.st_size}')
+    return summary
+
+
+def has_rows(df):
+    """
+    Return whether a frame holds individual medal rows rather than streamed aggregates.
+    """
+    return 'athlete_full_name' in df.columns
+
+
+def _concat_column(columns):
+    # Categoricals are merged onto the sorted union of their categories
+    if isinstance(columns[0].dtype, pd.CategoricalDtype):
+        return union_categoricals(columns, sort_categories=True)
+    return pd.concat(columns, ignore_index=True)
+
+
+def _concat_frames(frames):
+    if len(frames) == 1:
+        return frames[0]
+    return pd.DataFrame({column: _concat_column([frame[column] for frame in frames]) for column in frames[0].columns})
+
+
+def append_frame(df, rows):
+    """
+    Return a prepared frame with raw rows for new Games appended.
+
+    Only the new rows are parsed, normalized, aggregated and sorted: the cube gains
+    their cells, every secondary index and the name search merge in their keys, and
+    the existing columns are copied once with their category codes remapped. The result gets a
+    new version, while the slices the rows do not touch (countries, disciplines,
+    athletes) keep theirs, so cached results scoped to them stay valid.
+
+    Parameters:
+        df (pandas.DataFrame): A frame from load_dataset, stream_dataset or append_frame.
+        rows (pandas.DataFrame): Raw rows with the columns of the source CSV.
+
+    Returns:
+        pandas.DataFrame: The combined frame; df is left unchanged.
+
+    Raises:
+        ValueError: If some rows belong to Games that df already holds.
+    """
+    cube = medal_cube(df)
+    loaded = set(cube.rollup('slug_game').index).intersection(rows['slug_game'].dropna())
+    if loaded:
+        raise ValueError(f"Games already loaded: {', '.join(sorted(loaded))}")
+
+    new = prepare(rows.reset_index(drop=True))
+    cube = MedalCube.combine([cube, MedalCube.from_frame(new)])
+    if has_rows(df):
+        combined = _concat_frames([df, new])
+        row_indexes.set(combined, {name: index.extend(new, len(df)) for name, index in row_indexes(df).items()})
+    else:
+        combined = cube.to_frame()
+    medal_cube.set(combined, cube)
+
+    # A name search that was never built is left to be built on first use
+    searches = name_search.cached(df)
+    if searches is not None:
+        name_search.set(combined, {
+            'athlete': searches['athlete'].extend(new['athlete_full_name'].dropna().unique()) if has_rows(df) else searches['athlete'],
+            'country': searches['country'].extend(new['country_name'].dropna().unique(), country_aliases()),
+        })
+
+    digest = hashlib.sha256(pd.util.hash_pandas_object(new, index=False).to_numpy().tobytes()).hexdigest()
+    version = f'{frame_version(df)}+{digest[:16]}'
+    versions = dict(key_versions(df))
+    for column in SLICE_COLUMNS:
+        if column in new:
+            versions.update(((column, value), version) for value in new[column].dropna().unique())
+    frame_version.set(combined, version)
+    key_versions.set(combined, versions)
+
+    merged = {name: list(raw_names) for name, raw_names in merged_countries(df).items()}
+    for name, raw_names in merged_countries(new).items():
+        merged[name] = sorted(set(merged.get(name, [])) | set(raw_names))
+    merged_countries.set(combined, dict(sorted(merged.items())))
+    return combined
+
+
+def append_games(rows):
+    """
+    Add rows for one or more new Games to the source and the process-wide dataset.
+
+    The rows are appended to the source CSV and the shared frame is replaced by
+    append_frame(); sessions already holding the old frame keep a consistent view.
+    The new rows are added to the columnar cache as one more part, so the next
+    start loads the combined data directly. Apart from the in-memory copy of the
+    existing columns made by append_frame(), the cost grows with the new rows only.
+
+    Parameters:
+        rows (pandas.DataFrame): Raw rows with the columns of the source CSV.
+
+    Returns:
+        pandas.DataFrame: The new process-wide frame.
+
+    Raises:
+        ValueError: If some source columns are missing or some rows belong to Games already loaded.
+    """
+    global _df
+    dset()
+    with _lock:
+        columns = pd.read_csv(SOURCE_PATH, nrows=0).columns
+        missing = columns.difference(rows.columns)
+        if len(missing):
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        df = append_frame(_df, rows)
+        before = os.stat(SOURCE_PATH)
+        rows[columns].to_csv(SOURCE_PATH, mode='a', header=False, index=False)
+        if has_rows(df):
+            _append_cache(df, df.iloc[len(_df):], SOURCE_PATH, before)
+        country_profiles(df)
+        _df = df
+    return df
+
 
-df = pd.read_csv('medals.csv')
-df.drop('country_code', axis=1, inplace=True)
-df.drop('country_3_letter_code', axis=1, inplace=True)
-df.drop('participant_title', axis=1, inplace=True)
-df.drop('athlete_url', axis=1, inplace=True)
-df['country_name'] = df['country_name'].replace('Soviet Union', 'Russian Federation')
-df['country_name'] = df['country_name'].replace('German Democratic Republic (Germany)', 'Germany')
-df['country_name'] = df['country_name'].replace('Olympic Athletes from Russia', 'Russian Federation')
-df['country_name'] = df['country_name'].replace('ROC', 'Russian Federation')
 def dset():
-    return df
\ No newline at end of file
+    """
+    Return the process-wide medals DataFrame, loading it on first use.
+
+    Every caller (and every Streamlit session) shares the same in-memory copy,
+    so it must be treated as read-only. The aggregate cube and the secondary
+    indexes are built alongside it, and the country profiles from the cube. The
+    name search is not: only the app needs it, and it warms it in the background. Sources
+    above STREAMING_THRESHOLD bytes are streamed into their aggregates instead
+    (see stream_dataset).
+    """
+    global _df
+    if _df is None:
+        with _lock:
+            if _df is None:
+                if os.path.getsize(SOURCE_PATH) > STREAMING_THRESHOLD:
+                    df = stream_dataset()
+                else:
+                    df = load_dataset()
+                    medal_cube(df)
+                    row_indexes(df)
+                country_profiles(df)
+                _df = df
+    return _df
+
+
+def version():
+    """
+    Return the version token of the process-wide dataset.
+    """
+    return frame_version(dset())
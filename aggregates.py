@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import per_frame
+
+# Dimensions the analysis pages group on
+CUBE_DIMENSIONS = ['country_name', 'discipline_title', 'medal_type', 'slug_game', 'event_gender']
+
+
+class MedalCube:
+    """
+    Row counts over CUBE_DIMENSIONS, stored sparsely as one entry per non-empty cell.
+
+    Each cell holds the category code of every dimension (-1 for a missing value)
+    and the number of rows falling into it. Rollups and slices only touch cells,
+    never the raw rows.
+    """
+
+    def __init__(self, categories, keys, counts):
+        self.categories = categories
+        self.dimensions = list(categories)
+        self.keys = keys
+        self.counts = counts
+
+    @classmethod
+    def from_codes(cls, categories, codes, weights=None):
+        """
+        Build a cube from per-dimension code arrays, summing weights (or counting rows) per cell.
+
+        Parameters:
+            categories (dict): Dimension name to its categories, in dimension order.
+            codes (list): One integer code array per dimension, -1 for missing values.
+            weights (numpy.ndarray): Optional row weights; each row counts once by default.
+
+        Returns:
+            MedalCube: The populated cube.
+        """
+        # Shift codes by one so missing values (-1) get their own slot
+        shape = tuple(len(labels) + 1 for labels in categories.values())
+        flat = np.ravel_multi_index([np.asarray(code, dtype=np.int64) + 1 for code in codes], shape)
+        cells, inverse = np.unique(flat, return_inverse=True)
+        counts = np.bincount(inverse, weights=weights, minlength=len(cells)).astype(np.int64)
+        keys = np.column_stack(np.unravel_index(cells, shape)).astype(np.int32) - 1
+        return cls(dict(categories), keys.reshape(len(cells), len(shape)), counts)
+
+    @classmethod
+    def from_frame(cls, df, dimensions=CUBE_DIMENSIONS):
+        """
+        Build a cube from a DataFrame, ideally with categorical dimension columns.
+
+        Parameters:
+            df (pandas.DataFrame): The DataFrame containing the data.
+            dimensions (list): The columns to aggregate over.
+
+        Returns:
+            MedalCube: The populated cube.
+        """
+        categories = {}
+        codes = []
+        for dimension in dimensions:
+            column = df[dimension]
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype('category')
+            categories[dimension] = column.cat.categories
+            codes.append(column.cat.codes.to_numpy(np.int64))
+        return cls.from_codes(categories, codes)
+
+    @classmethod
+    def combine(cls, cubes):
+        """
+        Merge cubes over the same dimensions whose categories may differ.
+
+        Cells are matched by label, so cubes built from separate chunks of a source
+        add up to the cube of the whole source.
+
+        Parameters:
+            cubes (list): The cubes to merge.
+
+        Returns:
+            MedalCube: A cube holding the summed counts.
+        """
+        dimensions = cubes[0].dimensions
+        categories = {}
+        for dimension in dimensions:
+            labels = cubes[0].categories[dimension]
+            for cube in cubes[1:]:
+                labels = labels.union(cube.categories[dimension])
+            categories[dimension] = labels
+
+        codes = [[] for _ in dimensions]
+        for cube in cubes:
+            for position, dimension in enumerate(dimensions):
+                remap = np.append(categories[dimension].get_indexer(cube.categories[dimension]), -1)
+                codes[position].append(remap[cube.keys[:, position]])
+        weights = np.concatenate([cube.counts for cube in cubes]).astype(np.float64)
+        return cls.from_codes(categories, [np.concatenate(code) for code in codes], weights)
+
+    def to_frame(self):
+        """
+        Return the cells as a DataFrame: one categorical column per dimension plus 'count'.
+        """
+        data = {
+            dimension: pd.Categorical.from_codes(self.keys[:, position], self.categories[dimension])
+            for position, dimension in enumerate(self.dimensions)
+        }
+        data['count'] = self.counts
+        return pd.DataFrame(data)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def rollup(self, *dimensions, **filters):
+        """
+        Count rows grouped by the given dimensions, optionally sliced on other dimensions.
+
+        Rows with a missing value in any grouped dimension are dropped, matching
+        DataFrame.groupby(...).size().
+
+        Parameters:
+            *dimensions (str): The dimensions to group by, in output order.
+            **filters: Dimension name to a label or list of labels to keep.
+
+        Returns:
+            pandas.Series or int: Counts indexed by the grouped labels, sorted by label;
+            the plain total when no dimension is given.
+        """
+        mask = np.ones(len(self.counts), dtype=bool)
+        for dimension, labels in filters.items():
+            labels = [labels] if np.isscalar(labels) else list(labels)
+            codes = self.categories[dimension].get_indexer(labels)
+            mask &= np.isin(self.keys[:, self.dimensions.index(dimension)], codes[codes >= 0])
+
+        positions = [self.dimensions.index(dimension) for dimension in dimensions]
+        for position in positions:
+            mask &= self.keys[:, position] >= 0
+
+        counts = self.counts[mask]
+        if not dimensions:
+            return int(counts.sum())
+
+        keys = self.keys[mask][:, positions]
+        shape = tuple(len(self.categories[dimension]) for dimension in dimensions)
+        cells, inverse = np.unique(np.ravel_multi_index(keys.T, shape), return_inverse=True)
+        totals = np.bincount(inverse, weights=counts, minlength=len(cells)).astype(np.int64)
+
+        levels = [pd.Index(self.categories[dimension]) for dimension in dimensions]
+        if len(dimensions) == 1:
+            index = levels[0].take(cells).rename(dimensions[0])
+        else:
+            index = pd.MultiIndex(levels=levels, codes=np.unravel_index(cells, shape), names=list(dimensions))
+        return pd.Series(totals, index=index, name='count')
+
+
+@per_frame
+def medal_cube(df):
+    """
+    Return the aggregate cube for a DataFrame, building it on first use.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        MedalCube: The cube over CUBE_DIMENSIONS.
+    """
+    return MedalCube.from_frame(df)
+
+
+@per_frame
+def country_profiles(df):
+    """
+    Return the profile of every country, computed from the aggregate cube in one pass.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        pandas.DataFrame: One row per country, indexed by country_name, with
+        most_participated_sport and its participant count, total_medals, the GOLD,
+        SILVER and BRONZE counts, led_disciplines and led_medal_counts (the disciplines
+        where the country has the most medals, and those counts), and rank (by gold,
+        then silver, then bronze; tied countries share a rank).
+    """
+    cube = medal_cube(df)
+
+    # Dense country x discipline and country x medal type count matrices
+    by_discipline = cube.rollup('country_name', 'discipline_title')
+    countries = by_discipline.index.levels[0]
+    disciplines = by_discipline.index.levels[1]
+    counts = np.zeros((len(countries), len(disciplines)), dtype=np.int64)
+    counts[by_discipline.index.codes[0], by_discipline.index.codes[1]] = by_discipline.to_numpy()
+
+    by_medal = cube.rollup('country_name', 'medal_type').unstack(fill_value=0)
+    medals = by_medal.reindex(index=countries, columns=['GOLD', 'SILVER', 'BRONZE'], fill_value=0).to_numpy()
+
+    # The first discipline (by label) with the most rows, and the first country leading each discipline
+    most_participated = counts.argmax(axis=1)
+    leaders = counts.argmax(axis=0)
+    led = [[] for _ in countries]
+    for discipline, country in enumerate(leaders):
+        led[country].append(discipline)
+
+    # Olympic ranking: gold, then silver, then bronze, ties sharing the best rank
+    order = np.lexsort((-medals[:, 2], -medals[:, 1], -medals[:, 0]))
+    ranked = medals[order]
+    new_rank = np.concatenate([[True], (ranked[1:] != ranked[:-1]).any(axis=1)])
+    rank = np.empty(len(countries), dtype=np.int64)
+    rank[order] = np.maximum.accumulate(np.where(new_rank, np.arange(1, len(countries) + 1), 0))
+
+    present = counts.sum(axis=1) > 0
+    profiles = pd.DataFrame({
+        'most_participated_sport': disciplines.take(most_participated),
+        'participants': counts[np.arange(len(countries)), most_participated],
+        'total_medals': counts.sum(axis=1),
+        'GOLD': medals[:, 0],
+        'SILVER': medals[:, 1],
+        'BRONZE': medals[:, 2],
+        'led_disciplines': [tuple(disciplines.take(codes)) for codes in led],
+        'led_medal_counts': [tuple(counts[country, codes].tolist()) for country, codes in enumerate(led)],
+        'rank': rank,
+    }, index=pd.Index(countries, name='country_name'))
+    return profiles[present]
+
+
+def medal_summary(df, countries, disciplines=None):
+    """
+    Return the headline medal numbers of some countries, optionally in some disciplines.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        countries (str or list): The country name(s).
+        disciplines (str or list): The discipline title(s); all disciplines by default.
+
+    Returns:
+        dict: 'Medals', 'Gold', 'Games with medals' and 'Best Games' (the slug game
+        with the most medals, '-' when there is none).
+    """
+    filters = {'country_name': countries}
+    if disciplines is not None:
+        filters['discipline_title'] = disciplines
+    medals = medal_cube(df).rollup('slug_game', 'medal_type', **filters)
+    per_game = medals.groupby(level='slug_game', observed=True).sum()
+    per_type = medals.groupby(level='medal_type', observed=True).sum()
+    return {
+        'Medals': int(per_game.sum()),
+        'Gold': int(per_type.get('GOLD', 0)),
+        'Games with medals': len(per_game),
+        'Best Games': per_game.idxmax() if len(per_game) else '-',
+    }
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def slider(labels, prefix='Slug Game: '):
+    """
+    Build a layout slider that steps through one animation frame per label.
+
+    Parameters:
+        labels (array-like): The label of every frame, in order.
+        prefix (str): The prefix shown before the current label.
+
+    Returns:
+        dict: The slider, ready to pass in fig.update_layout(sliders=[...]).
+    """
+    return {
+        'currentvalue': {'prefix': prefix},
+        'steps': [
+            {'method': 'animate', 'args': [[f'frame{i}']], 'label': f'{label}'} for i, label in enumerate(np.asarray(labels).tolist())
+        ],
+        'transition': {'duration': 500, 'easing': 'linear'},
+        'x': 0.1, 'len': 0.9,
+        'y': 0, 'yanchor': 'top',
+        'pad': {'t': 50, 'b': 10},
+        'active': 0,
+    }
+
+
+def bar_frames(labels, traces):
+    """
+    Build one animation frame per label, each holding a single bar for every trace.
+
+    The values are pulled out of their columns once, so building the frames is linear
+    in the number of labels instead of rescanning the frame for every slug game.
+
+    Parameters:
+        labels (array-like): The x value of every frame (usually the slug games).
+        traces (list): (values, properties) pairs, where values holds one y value per label
+            and properties holds the fixed bar attributes (name, marker, ...).
+
+    Returns:
+        list: Frame dicts named frame0, frame1, ..., ready to assign to fig.frames.
+    """
+    labels = np.asarray(labels).tolist()
+    columns = [(np.asarray(values).tolist(), properties) for values, properties in traces]
+    return [
+        {
+            'name': f'frame{i}',
+            'data': [dict(properties, type='bar', x=[label], y=[values[i]]) for values, properties in columns],
+        }
+        for i, label in enumerate(labels)
+    ]
@@ -0,0 +1,322 @@
+"""
+Headless HTTP API returning the analysis results as JSON, CSV, Parquet or Arrow.
+
+Every request runs in the same process as the others, so the loaded dataset, its
+aggregates and indexes, and the result cache are shared by all of them. Requests
+are served concurrently by a fixed pool of worker threads.
+
+Endpoints (GET, parameters in the query string; list parameters may repeat):
+    /                       the endpoints and their parameters
+    /version                the dataset version and row count
+    /country?name=          the profile of a country
+    /ranking                all countries ranked by gold, silver and bronze
+    /compare?countries=&disciplines=
+                            medals per country, discipline and slug game
+    /gender-orientation?period=
+                            gender orientation per discipline ('slug_game' or 'decade' periods)
+    /athletes?names=        medals per athlete and slug game
+    /geo                    per-country medal counts with ISO codes
+    /rows?offset=&limit=&sort_by=&descending=&<column>=
+                            one page of the medal rows, filtered on any columns
+    /export?sort_by=&descending=&<column>=
+                            every matching medal row, streamed (not json)
+
+Every endpoint takes format=json (the default, one object per row), csv, parquet
+or arrow (the Arrow IPC file format). The dataset version is sent in the
+X-Dataset-Version header. /export encodes the rows one chunk at a time straight
+into a chunked response, so results of any size are sent in bounded memory.
+
+Usage:
+    python api.py --port 8600 --workers 8
+"""
+import argparse
+import json
+import shutil
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import Dataset_prep as dap
+import country_analysis as ca
+import event_analysis as ea
+import geo as ge
+import medal_analysis as ma
+import player_analysis as pa
+from export import FORMATS, available_formats, export_file, flatten, frame_chunks, query_chunks, write
+from frame_cache import frame_version
+from query import PAGE_SIZE, page
+
+WORKERS = 8
+
+# The largest page /rows returns
+MAX_LIMIT = 10_000
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f'Missing parameter: {name}')
+        return default
+    return values[0]
+
+
+def _many(params, name):
+    values = params.get(name)
+    if not values:
+        raise ValueError(f'Missing parameter: {name}')
+    return values
+
+
+def _needs_rows(df):
+    if not dap.has_rows(df):
+        raise ValueError('The medal rows are not kept for datasets this large')
+
+
+def _country(df, params):
+    return ca.country_profiles(df).loc[[_one(params, 'name')]]
+
+
+def _ranking(df, params):
+    return ca.country_ranking(df)
+
+
+def _compare(df, params):
+    return ma.compare_countries(df, _many(params, 'countries'), _many(params, 'disciplines'))
+
+
+def _gender_orientation(df, params):
+    period = params.get('period', [None])[0]
+    if period not in (None, *ea.PERIODS):
+        raise ValueError(f'Unknown period: {period}')
+    return ea.gender_orientation(df, period)
+
+
+def _athletes(df, params):
+    _needs_rows(df)
+    return pa.athlete_medals(df, _many(params, 'names'))
+
+
+def _geo(df, params):
+    return ge.geo_table(df)
+
+
+def _query(df, params):
+    # Split the sort order from the column predicates
+    _needs_rows(df)
+    params = dict(params)
+    sort_by = params.pop('sort_by', [None])[0]
+    ascending = params.pop('descending', ['false'])[0].lower() not in ('1', 'true', 'yes')
+    for column in [sort_by, *params]:
+        if column is not None and column not in df.columns:
+            raise ValueError(f'Unknown column: {column}')
+    return sort_by, ascending, params
+
+
+def _rows(df, params):
+    params = dict(params)
+    offset = int(params.pop('offset', ['0'])[0])
+    limit = min(int(params.pop('limit', [str(PAGE_SIZE)])[0]), MAX_LIMIT)
+    if offset < 0 or limit < 0:
+        raise ValueError('offset and limit must not be negative')
+    sort_by, ascending, predicates = _query(df, params)
+    rows, _total = page(df, offset, limit, sort_by, ascending, **predicates)
+    return rows
+
+
+class _ChunkedBody:
+    """
+    A write-only binary file sending what is written as an HTTP/1.1 chunked body.
+
+    Writes are buffered up to BUFFER_BYTES, so small encoder writes do not each
+    become a chunk; close() sends the rest and the terminating chunk.
+    """
+
+    BUFFER_BYTES = 1 << 16
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        if len(self.buffer) >= self.BUFFER_BYTES:
+            self.flush()
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        if self.buffer:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(self.buffer), self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        if not self.closed:
+            self.flush()
+            self.wfile.write(b'0\r\n\r\n')
+            self.closed = True
+
+
+# Path -> (function of the frame and the query parameters returning a DataFrame, parameters)
+ENDPOINTS = {
+    '/country': (_country, ['name']),
+    '/ranking': (_ranking, []),
+    '/compare': (_compare, ['countries', 'disciplines']),
+    '/gender-orientation': (_gender_orientation, ['period']),
+    '/athletes': (_athletes, ['names']),
+    '/geo': (_geo, []),
+    '/rows': (_rows, ['offset', 'limit', 'sort_by', 'descending', '<column>']),
+}
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """
+    Answer GET requests from ENDPOINTS against the process-wide dataset.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # Close idle keep-alive connections, so they do not hold on to a pool worker
+    timeout = 5
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        df = dap.dset()
+
+        if url.path == '/':
+            listing = {path: parameters for path, (_func, parameters) in ENDPOINTS.items()}
+            listing['/export'] = ['sort_by', 'descending', '<column>']
+            return self._json(200, listing, df)
+        if url.path == '/version':
+            return self._json(200, {'version': frame_version(df), 'rows': len(df)}, df)
+        if url.path == '/export':
+            return self._export(params, df)
+        if url.path not in ENDPOINTS:
+            return self._json(404, {'error': f'Unknown endpoint: {url.path}'}, df)
+
+        fmt = params.pop('format', ['json'])[0]
+        if fmt != 'json' and fmt not in available_formats():
+            return self._json(400, {'error': f'Unsupported format: {fmt}'}, df)
+        try:
+            frame = ENDPOINTS[url.path][0](df, params)
+            if fmt == 'json':
+                body = flatten(frame).to_json(orient='records').encode()
+                return self._send(200, 'application/json', body, df)
+
+            # Other formats are encoded chunk by chunk into a temporary file, then copied out
+            file = export_file(frame_chunks(frame), fmt)
+        except KeyError as error:
+            return self._json(404, {'error': f'Not found: {error}'}, df)
+        except ValueError as error:
+            return self._json(400, {'error': str(error)}, df)
+        except Exception as error:
+            traceback.print_exc()
+            return self._json(500, {'error': f'{type(error).__name__}: {error}'}, df)
+
+        with file:
+            size = file.seek(0, 2)
+            file.seek(0)
+            self._headers(200, FORMATS[fmt][1], size, df)
+            shutil.copyfileobj(file, self.wfile)
+
+    def _export(self, params, df):
+        fmt = params.pop('format', ['csv'])[0]
+        if fmt not in available_formats():
+            return self._json(400, {'error': f'Unsupported format: {fmt}'}, df)
+        try:
+            sort_by, ascending, predicates = _query(df, params)
+        except ValueError as error:
+            return self._json(400, {'error': str(error)}, df)
+        except Exception as error:
+            traceback.print_exc()
+            return self._json(500, {'error': f'{type(error).__name__}: {error}'}, df)
+
+        # The length is unknown until the last chunk is encoded
+        self._headers(200, FORMATS[fmt][1], None, df)
+        body = _ChunkedBody(self.wfile)
+        try:
+            write(query_chunks(df, sort_by, ascending, **predicates), body, fmt)
+        except Exception:
+            # The status is already sent: drop the connection without the terminating chunk
+            self.close_connection = True
+            raise
+        body.close()
+
+    def _headers(self, status, content_type, length, df):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if length is None:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Content-Length', str(length))
+        self.send_header('X-Dataset-Version', frame_version(df))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        # One line per request is too much at dashboard request rates
+        pass
+
+    def _send(self, status, content_type, body, df):
+        self._headers(status, content_type, len(body), df)
+        self.wfile.write(body)
+
+    def _json(self, status, payload, df):
+        self._send(status, 'application/json', json.dumps(payload).encode(), df)
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """
+    A ThreadingHTTPServer that serves connections on a fixed pool of threads instead
+    of starting a thread per connection.
+    """
+
+    def __init__(self, address, handler, workers=WORKERS):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def serve(host='127.0.0.1', port=8600, workers=WORKERS):
+    """
+    Load the dataset, then serve the API until interrupted.
+
+    Parameters:
+        host (str): The interface to listen on.
+        port (int): The port to listen on.
+        workers (int): The number of requests handled at once.
+    """
+    dap.dset()
+    with PooledHTTPServer((host, port), AnalysisHandler, workers) as server:
+        print(f'Serving the analysis API on http://{host}:{server.server_port}/', file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,75 @@
 import streamlit as st
 import pandas as pd
-import geo as ge
-import country_analysis as ca
-import event_analysis as ea
-import medal_analysis as ma
-import player_analysis as pa
-import about as abt
 import Dataset_prep as dap
+from background import executor
+from export import MAX_DOWNLOAD_ROWS, download, frame_chunks, query_chunks
+from query import PAGE_SIZE, ordered, page
+from search import name_search, suggest
 from streamlit.components.v1 import html
 
 df = dap.dset()
 
+# Build the name search off the script thread: the first page does not wait for it,
+# and a keystroke arriving before it is done waits for this build instead of starting another
+if name_search.cached(df) is None:
+    executor.submit(name_search, df)
+
+
+def suggestion_box(label, kind):
+    """
+    Text input for an athlete or country name backed by ranked suggestions.
+
+    Parameters:
+        label (str): The label of the text input.
+        kind (str): 'athlete' or 'country'.
+
+    Returns:
+        str: The selected suggestion, or the typed text when nothing matches.
+    """
+    query = st.text_input(label)
+    matches = suggest(df, kind, query) if query.strip() else []
+    if not matches:
+        return query.strip()
+    return st.selectbox("Did you mean:", matches, key=f"{label}-suggestions")
+
+
+def browse(predicates):
+    """
+    Show the rows matching some predicates one page at a time.
+
+    Sorting, filtering and paging run on the server, so only the current page is
+    sent to the browser whatever the size of the dataset.
+
+    Parameters:
+        predicates (dict): Column name to the value its rows must have.
+    """
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Sort by:", ["(dataset order)"] + list(df.columns), key="browse-sort")
+    with col2:
+        ascending = st.radio("Order:", ("Ascending", "Descending"), horizontal=True, key="browse-order") == "Ascending"
+    with col3:
+        filter_column = st.selectbox("Filter on:", ["(none)"] + [column for column in dap.CATEGORICAL_COLUMNS if column in df.columns], key="browse-filter")
+
+    predicates = dict(predicates)
+    if filter_column != "(none)":
+        values = st.multiselect(f"Keep the rows whose {filter_column} is:", list(df[filter_column].cat.categories), key="browse-values")
+        if values:
+            predicates[filter_column] = values
+
+    sort_by = None if sort_by == "(dataset order)" else sort_by
+    total = len(ordered(df, sort_by, ascending, **predicates))
+    page_count = max(1, -(-total // PAGE_SIZE))
+    # A new sort or filter starts again from the first page
+    page_number = st.number_input(f"Page (of {page_count}):", min_value=1, max_value=page_count, value=1, key=f"browse-page-{sort_by}-{ascending}-{total}")
+
+    rows, total = page(df, (page_number - 1) * PAGE_SIZE, PAGE_SIZE, sort_by, ascending, **predicates)
+    st.dataframe(rows)
+    st.caption(f"Rows {min(total, (page_number - 1) * PAGE_SIZE + 1)}-{(page_number - 1) * PAGE_SIZE + len(rows)} of {total}")
+    download("Download all matching rows", lambda: query_chunks(df, sort_by, ascending, **predicates), "medals", "browse")
+    if total > MAX_DOWNLOAD_ROWS:
+        st.caption(f"Downloads stop after the first {MAX_DOWNLOAD_ROWS} rows; the API's /export endpoint returns all of them.")
+
 
 # Hide Default streamlit functions
 hide_st_style = """
@@ -32,95 +91,129 @@ with st.sidebar:
         ("About-page","Event Analysis", "Medal Analysis", "Player Analysis", "Country Analysis", "Geospatial Analysis", "Dataset")
     )
 
+# Streamed datasets only keep aggregates, so the row-level pages are unavailable
+if add_radio in ("Player Analysis", "Dataset") and not dap.has_rows(df):
+    st.info("This page needs the individual medal rows, which are not kept for datasets this large.")
+    st.stop()
+
+# Page modules (and their plotting stacks) are imported inside the page that uses them,
+# so a session only pays for the pages it opens
+
 #About Section
 if add_radio == "About-page":
+    import about as abt
     abt.render_html_file()
 
     
 #event analysis page
 if add_radio == "Event Analysis":
+    import event_analysis as ea
     st.subheader("Event Analysis")
-    balanced_orientation_df,male_orientation_df,female_orientation_df = ea.analyze_gender_orientation(df)
-    ea.plot_gender_orientation(balanced_orientation_df, male_orientation_df, female_orientation_df)
+    event_radio = st.radio(
+        "How would you like to view gender orientation?", 
+        ("Overall", "By Games", "By Decade")
+    )
+    if event_radio == 'Overall':
+        ea.plot_dataset_gender_orientation(df)
+
+    if event_radio == 'By Games':
+        ea.orientation_over_time(df, 'slug_game')
+
+    if event_radio == 'By Decade':
+        ea.orientation_over_time(df, 'decade')
 
 #medal analysis page
 if add_radio == "Medal Analysis":
+    import medal_analysis as ma
     st.subheader("Medal Analysis")
     medal_radio = st.radio(
         "What type of analysis would you like to perform?", 
-        ("Single Country", "Two Country")
+        ("Single Country", "Compare Countries")
     )
     if medal_radio == 'Single Country':
-        country_name = st.text_input("Enter the country of Interest:")
+        country_name = suggestion_box("Enter the country of Interest:", "country")
         discipline_title = st.text_input("Enter the discipline:")
         if st.button("Analyse Medals"):
             ma.create_slider_plot(df, country_name, discipline_title)
 
-    if medal_radio == 'Two Country':
-        country1_name = st.text_input("Enter the first country: ")
-        country2_name = st.text_input("Enter the second country: ")
-        discipline_title = st.text_input("Enter the discipline title: ")
+    if medal_radio == 'Compare Countries':
+        countries = st.multiselect("Select the countries to compare:", ma.dimension_values(df, 'country_name'))
+        disciplines = st.multiselect("Select the disciplines:", ma.dimension_values(df, 'discipline_title'))
         if st.button("Perform analysis"):
-            ma.compare_plot(df, country1_name, country2_name, discipline_title)
+            if countries and disciplines:
+                ma.compare_many(df, countries, disciplines)
+            else:
+                st.warning("Select at least one country and one discipline.")
 
 #player analysys page
 if add_radio == "Player Analysis":
+    import player_analysis as pa
     st.subheader("Player Analysis")
     player_radio = st.radio(
         "What type of analysis would you like to perform?", 
         ("Single Player", "Multi Player")
     )
     if player_radio == 'Single Player':
-        name = st.text_input("Enter player name: ")
+        name = suggestion_box("Enter player name: ", "athlete")
         if st.button("Analyse player"):
             pa.create_medal_count_plot(name,df)
     
     if player_radio == 'Multi Player':
-        athlete1 = st.text_input("Enter the name of the first athlete: ").strip()
-        athlete2 = st.text_input("Enter the name of the second athlete: ").strip()
+        queries = st.text_area("Enter the athletes to compare, one per line: ").splitlines()
+        athletes = [match[0] for match in (suggest(df, "athlete", query, limit=1) for query in queries if query.strip()) if match]
+        if athletes:
+            st.caption("Comparing: " + ", ".join(athletes))
         if st.button('Compare Players'):
-            pa.medal_compare(athlete1, df)
-            pa.medal_compare(athlete2, df)
+            pa.compare_athletes(df, athletes)
 
 #contry analysys page
 if add_radio == "Country Analysis":
+    import country_analysis as ca
     st.subheader("Country Analysis")
     country_radio = st.radio(
         "What type of analysis would you like to perform?", 
-        ("Performance", "Total Medal count","Individual Medal count")
+        ("Performance", "Total Medal count","Individual Medal count", "Ranking")
     )
 
     if country_radio == 'Performance':
         st.subheader('Country analysis of performance')
-        country = st.text_input("Enter the Country to be considered:")  # Specify the country of interest
+        country = suggestion_box("Enter the Country to be considered:", "country")  # Specify the country of interest
         if st.button('Analyse performance'):
             ca.country_analysis(df,country)
 
+    if country_radio == 'Ranking':
+        st.subheader('Ranking of all countries')
+        st.dataframe(ca.country_ranking(df))
+        download("Download the ranking", lambda: frame_chunks(ca.country_ranking(df)), "country_ranking", "ranking")
+
     if country_radio == 'Total Medal count':
         st.subheader('Country analysis based on medal count')
         col1,col2 = st.columns(2)
         with col1:
-            country_name = st.text_input("Enter the country of Interest:")
+            country_name = suggestion_box("Enter the country of Interest:", "country")
         with col2:
             discipline_title = st.text_input("Enter the discipline:")
 
         if st.button('Analyse medal count'):
             ca.create_slider_plot(df, country_name, discipline_title)
+            download("Download the medal counts", lambda: frame_chunks(ca.track_country_performance(df, country_name, discipline_title)), f"{country_name}_{discipline_title}_medals", "total-medals")
     
     if country_radio == 'Individual Medal count':
         st.subheader('Country analysis based on Individual medals')
         col1,col2 = st.columns(2)
         with col1:
-            country_name = st.text_input("Enter the country of Interest:")
+            country_name = suggestion_box("Enter the country of Interest:", "country")
         with col2:
             discipline_title = st.text_input("Enter the discipline:")
 
         if st.button('Analyse medal count'):
             ca.create(df, country_name, discipline_title)
+            download("Download the medal counts", lambda: frame_chunks(ca.track_performance(df, country_name, discipline_title)), f"{country_name}_{discipline_title}_medals", "individual-medals")
 
 
 #geospatial analysis page
 if add_radio == "Geospatial Analysis":
+    import geo as ge
     geo_radio = st.radio(
         "What Visualization are you looking for?", 
         ("Total Medals","Individual Medals","Top Disciplines")
@@ -146,28 +239,29 @@ if add_radio == "Dataset":
     if data_radio=='Entire Data Set':
         st.subheader('Complete Dataset:')
         if st.button('GENERATE'):
-            df=dap.dset()
-            st.dataframe(df)
+            st.session_state['dataset_query'] = (data_radio, {})
     
     if data_radio=='Discipline Wise':
         st.subheader('Discipline wise:')
         Discipline_name = st.text_input("Enter the Discipline of Interest:")
         if st.button('GENERATE'):
-            df=dap.dset()
-            st.dataframe(df[df['discipline_title']==Discipline_name])
+            st.session_state['dataset_query'] = (data_radio, {'discipline_title': Discipline_name})
 
     if data_radio=='Country Wise':
         st.subheader('Country wise:')
-        country = st.text_input("Enter the Country of Interest:")
+        country = suggestion_box("Enter the Country of Interest:", "country")
         if st.button('GENERATE'):
-            df=dap.dset()
-            st.dataframe(df[df['country_name']==country])
+            st.session_state['dataset_query'] = (data_radio, {'country_name': country})
             
     if data_radio=='Participant wise':
         st.subheader('Participant wise:')
-        player = st.text_input("Enter the player of Interest:")
+        player = suggestion_box("Enter the player of Interest:", "athlete")
         if st.button('GENERATE'):
-            df=dap.dset()
-            st.dataframe(df[df['athlete_full_name']==player])
+            st.session_state['dataset_query'] = (data_radio, {'athlete_full_name': player})
+
+    # The generated query stays on screen while the reader sorts, filters and pages through it
+    dataset_query = st.session_state.get('dataset_query')
+    if dataset_query is not None and dataset_query[0] == data_radio:
+        browse(dataset_query[1])
     
     
\ No newline at end of file
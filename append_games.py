@@ -0,0 +1,38 @@
+"""
+Append the rows of new Games to the medals dataset and its columnar cache.
+
+Each file holds raw rows with the columns of medals.csv, for Games the dataset
+does not hold yet. Only the new rows are parsed and cached (see
+Dataset_prep.append_games). Processes already serving the dataset (the app, the
+API) keep their copy until they restart; run prerender.py afterwards to warm the
+spec store for the new version.
+
+Usage:
+    python append_games.py new_games.csv [more.csv ...]
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+import Dataset_prep as dap
+from frame_cache import frame_version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='CSV files of new Games')
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        try:
+            df = dap.append_games(pd.read_csv(path))
+        except ValueError as error:
+            print(f'{path}: {error}', file=sys.stderr)
+            return 1
+        print(f'Appended {path}: {len(df)} rows, dataset version {frame_version(df)}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Run the analysis entry points on a shared thread pool and show their results in stages.
+
+A page submits every piece it needs at once (headline numbers, the chart without its
+animation, tables) and each one is drawn into its own placeholder as soon as it is
+ready, in whatever order they finish. Cheap pieces appear first, and one slow query
+does not hold up the rest of the page. Pieces that build on another one (the full
+animated chart) start once it is done, so they reuse its cached results.
+
+The submitted functions only compute; every Streamlit call happens on the script
+thread, so no script context has to be passed to the workers.
+"""
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import streamlit as st
+
+# Analysis work is numpy/pandas heavy, which releases the GIL for most of its runtime
+MAX_WORKERS = 4
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='analysis')
+
+# func(*args) runs on the pool, then show(placeholder, result) draws it into the slot's placeholder;
+# a stage with after=True only starts once the previous stage of its slot has finished
+Stage = namedtuple('Stage', ['slot', 'func', 'args', 'show', 'after'], defaults=[False])
+
+
+def show_metrics(placeholder, metrics):
+    """
+    Draw a dict of label -> value as a row of st.metric.
+    """
+    with placeholder.container():
+        for column, (label, value) in zip(st.columns(len(metrics)), metrics.items()):
+            column.metric(label, value)
+
+
+def show_chart(placeholder, fig):
+    placeholder.plotly_chart(fig)
+
+
+def show_table(placeholder, table):
+    placeholder.dataframe(table)
+
+
+def show_staged(stages):
+    """
+    Run the stages on the pool and draw each result as soon as it is ready.
+
+    Stages sharing a slot share one placeholder and are listed from the quickest to the
+    most complete: a later stage replaces an earlier one, and an earlier stage that
+    finishes late never overwrites a later one. Stages start at once, except those with
+    after=True, which start when the previous stage of their slot finishes. A failing
+    stage shows its error in its slot and leaves the others alone.
+
+    Parameters:
+        stages (list): Stage tuples, in page order.
+    """
+    placeholders = {}
+    for stage in stages:
+        if stage.slot not in placeholders:
+            placeholders[stage.slot] = st.empty()
+            placeholders[stage.slot].caption('Loading...')
+
+    futures = {}
+
+    def submit(position):
+        future = executor.submit(stages[position].func, *stages[position].args)
+        futures[future] = position
+        return future
+
+    # Position of a stage -> position of the stage waiting for it
+    followers = {}
+    last = {}
+    pending = set()
+    for position, stage in enumerate(stages):
+        if stage.after and stage.slot in last:
+            followers[last[stage.slot]] = position
+        else:
+            pending.add(submit(position))
+        last[stage.slot] = position
+
+    shown = {}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            position = futures[future]
+            if position in followers:
+                pending.add(submit(followers[position]))
+            stage = stages[position]
+            if shown.get(stage.slot, -1) > position:
+                continue
+            shown[stage.slot] = position
+            try:
+                stage.show(placeholders[stage.slot], future.result())
+            except Exception as error:
+                placeholders[stage.slot].exception(error)
+
+
+def show_animated(figure, args, summary=None, summary_args=None, extra=()):
+    """
+    Show an animated figure in three stages: the summary numbers, the chart without its
+    slider and frames, then the full animated chart.
+
+    The full chart starts once the chart without frames is drawn, so its spec comes
+    from the cache instead of being computed twice on the shared pool.
+
+    Parameters:
+        figure (callable): Builds the figure from args; must accept frames=False.
+        args (tuple): The figure's arguments.
+        summary (callable): Optional function returning a dict of headline numbers.
+        summary_args (tuple): The summary's arguments (the figure's by default).
+        extra (list): More stages to run alongside, shown below the chart.
+    """
+    stages = []
+    if summary is not None:
+        stages.append(Stage('summary', summary, args if summary_args is None else summary_args, show_metrics))
+    stages.append(Stage('chart', partial(figure, frames=False), args, show_chart))
+    stages.append(Stage('chart', figure, args, show_chart, after=True))
+    show_staged(stages + list(extra))
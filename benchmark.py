@@ -0,0 +1,241 @@
+"""
+Headless benchmarks for the analysis functions.
+
+Every public function of Dataset_prep, country_analysis, medal_analysis,
+event_analysis, player_analysis and geo is run against the real medals.csv and
+against synthetic datasets (see generate_dataset.py) scaled to 10x and 100x its rows. Streamlit rendering
+(st.plotly_chart and placeholder charts, Figure.show) is replaced by a no-op, the result cache is
+cleared before every call and the prerendered spec store is bypassed, so the numbers
+are pure compute and figure building.
+
+Usage:
+    python benchmark.py                 # run and compare with the saved baseline
+    python benchmark.py --save          # run and save a new baseline
+    python benchmark.py --scales 1 10   # only some dataset sizes
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+
+import Dataset_prep as dap
+import country_analysis as ca
+import event_analysis as ea
+import geo as ge
+import medal_analysis as ma
+import player_analysis as pa
+import spec_store
+from aggregates import country_profiles, medal_cube
+from frame_cache import per_frame
+from generate_dataset import generate_frame
+from indexes import row_indexes
+from result_cache import shared_cache
+from search import name_search
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# A run slower than the baseline by more than this factor is reported as a regression
+REGRESSION_FACTOR = 1.5
+
+# ... and by more than this many ms, so timer noise on sub-millisecond calls is not reported
+REGRESSION_MIN_MS = 1.0
+
+COUNTRY = 'United States of America'
+OTHER_COUNTRY = 'Great Britain'
+COUNTRIES = [COUNTRY, OTHER_COUNTRY, 'France', 'Germany', 'Italy', 'Japan', 'Kenya', 'Norway', 'Russian Federation', 'Sweden']
+DISCIPLINE = 'Athletics'
+
+
+@per_frame
+def athlete(df):
+    # Synthetic data has made-up athletes, so use the one with the most rows
+    return df['athlete_full_name'].value_counts().index[0]
+
+
+@per_frame
+def athletes(df):
+    # The twenty athletes with the most rows, for the multi-athlete comparison
+    return df['athlete_full_name'].value_counts().index[:20].tolist()
+
+
+# name -> function of the prepared frame
+BENCHMARKS = {
+    'aggregates.medal_cube': lambda df: medal_cube.__wrapped__(df),
+    'indexes.row_indexes': lambda df: row_indexes.__wrapped__(df),
+    'country_analysis.determine_most_participated_sport': lambda df: ca.determine_most_participated_sport(df, COUNTRY),
+    'country_analysis.determine_best_medals_by_discipline': lambda df: ca.determine_best_medals_by_discipline(df, COUNTRY),
+    'country_analysis.country_analysis': lambda df: ca.country_analysis(df, COUNTRY),
+    'country_analysis.track_country_performance': lambda df: ca.track_country_performance(df, COUNTRY, DISCIPLINE),
+    'country_analysis.create_slider_plot': lambda df: ca.create_slider_plot(df, COUNTRY, DISCIPLINE),
+    'country_analysis.track_performance': lambda df: ca.track_performance(df, COUNTRY, DISCIPLINE),
+    'country_analysis.create': lambda df: ca.create(df, COUNTRY, DISCIPLINE),
+    'country_analysis.tr_performance': lambda df: ca.tr_performance(df, COUNTRY, DISCIPLINE),
+    'country_analysis.cr_slider_plot': lambda df: ca.cr_slider_plot(df, COUNTRY, OTHER_COUNTRY, DISCIPLINE),
+    'medal_analysis.track_country_performance': lambda df: ma.track_country_performance(df, COUNTRY, DISCIPLINE),
+    'medal_analysis.create_slider_plot': lambda df: ma.create_slider_plot(df, COUNTRY, DISCIPLINE),
+    'medal_analysis.track_compare_performance': lambda df: ma.track_compare_performance(df, COUNTRY, DISCIPLINE),
+    'medal_analysis.compare_plot': lambda df: ma.compare_plot(df, COUNTRY, OTHER_COUNTRY, DISCIPLINE),
+    'medal_analysis.compare_countries': lambda df: ma.compare_countries(df, COUNTRIES, [DISCIPLINE, 'Swimming']),
+    'medal_analysis.compare_many': lambda df: ma.compare_many_figure(df, COUNTRIES, [DISCIPLINE, 'Swimming']),
+    'event_analysis.analyze_gender_orientation': lambda df: ea.analyze_gender_orientation(df),
+    'event_analysis.plot_gender_orientation': lambda df: ea.plot_gender_orientation(*ea.analyze_gender_orientation(df)),
+    'player_analysis.create_medal_count_plot': lambda df: pa.create_medal_count_plot(athlete(df), df),
+    'player_analysis.medal_compare': lambda df: pa.medal_compare(athlete(df), df),
+    'player_analysis.athlete_medals': lambda df: pa.athlete_medals(df, athletes(df)),
+    'player_analysis.compare_athletes': lambda df: pa.compare_athletes(df, athletes(df)),
+    'geo.geo_table': lambda df: ge.geo_table.__wrapped__(df),
+    'geo.geo': lambda df: ge.geo(df),
+    'geo.create_choropleth_map': lambda df: ge.create_choropleth_map(df),
+    'geo.geo_dis': lambda df: ge.geo_dis(df),
+}
+
+
+def scaled_raw(raw, scale, seed=0):
+    """
+    Return the raw medals rows, or a synthetic raw frame with `scale` times their count.
+
+    Parameters:
+        raw (pandas.DataFrame): The DataFrame as read from medals.csv.
+        scale (int): The size multiplier.
+        seed (int): The random seed.
+
+    Returns:
+        pandas.DataFrame: A raw frame with the same schema and value distributions.
+    """
+    if scale == 1:
+        return raw
+    return generate_frame(len(raw) * scale, seed=seed)
+
+
+def measure(func, repeat):
+    """
+    Time a call and trace its memory.
+
+    Returns:
+        dict: Best and median wall time in ms over `repeat` untraced runs, then the peak
+        traced memory in KB and the net number of allocated blocks of one traced run.
+    """
+    times = []
+    for _ in range(repeat):
+        shared_cache.clear()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    shared_cache.clear()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    return {
+        'best_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'peak_kb': round(peak / 1024, 1),
+        'allocations': allocations,
+    }
+
+
+def run(scales, repeat):
+    """
+    Run every benchmark on every dataset scale.
+
+    Returns:
+        dict: '<scale>x' -> benchmark name -> measurements.
+    """
+    raw = pd.read_csv(dap.SOURCE_PATH)
+    results = {}
+    with mock.patch.object(st, 'plotly_chart'), mock.patch.object(DeltaGenerator, 'plotly_chart'), mock.patch.object(go.Figure, 'show'), \
+            mock.patch.object(spec_store, 'STORE_DIR', os.path.join(os.path.dirname(BASELINE_PATH), '.cache', 'benchmark-no-store')):
+        for scale in scales:
+            scaled = scaled_raw(raw, scale)
+            report = {
+                'rows': len(scaled),
+                'Dataset_prep.prepare': measure(lambda: dap.prepare(scaled), repeat),
+            }
+            if scale == 1:
+                report['Dataset_prep.load_dataset (cold)'] = measure(lambda: dap.load_dataset(use_cache=False), repeat)
+                report['Dataset_prep.load_dataset (warm)'] = measure(lambda: dap.load_dataset(), repeat)
+
+            # Build the per-frame structures up front, as dset() and the app's background warm-up do
+            df = dap.prepare(scaled)
+            medal_cube(df)
+            row_indexes(df)
+            country_profiles(df)
+            name_search(df)
+            athlete(df)
+            athletes(df)
+            for name, func in BENCHMARKS.items():
+                report[name] = measure(lambda: func(df), repeat)
+                print(f"{scale:>4}x  {name:<55}{report[name]['median_ms']:>10.1f} ms", file=sys.stderr)
+            results[f'{scale}x'] = report
+    return results
+
+
+def compare(results, baseline):
+    """
+    Compare a run with the baseline.
+
+    Returns:
+        tuple: The (scale, name, baseline ms, current ms) rows that regressed, and the
+        (scale, name) of the benchmarks run that have no baseline entry.
+    """
+    regressions = []
+    missing = []
+    for scale, report in results.items():
+        for name, current in report.items():
+            if not isinstance(current, dict):
+                continue
+            previous = baseline.get(scale, {}).get(name)
+            if previous is None:
+                missing.append((scale, name))
+            elif current['median_ms'] > max(previous['median_ms'] * REGRESSION_FACTOR, previous['median_ms'] + REGRESSION_MIN_MS):
+                regressions.append((scale, name, previous['median_ms'], current['median_ms']))
+    return regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.repeat)
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(json.dumps(results, indent=2))
+        return 0
+
+    with open(args.baseline) as file:
+        regressions, missing = compare(results, json.load(file))
+    for scale, name, previous, current in regressions:
+        print(f'REGRESSION {scale} {name}: {previous:.1f} ms -> {current:.1f} ms')
+    # A benchmark without a baseline is never checked, so it fails the run until --save records it
+    for scale, name in missing:
+        print(f'MISSING {scale} {name}: no baseline entry, run with --save')
+    print(f'{len(regressions)} regression(s) and {len(missing)} missing baseline entries against {args.baseline}')
+    return 1 if regressions or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
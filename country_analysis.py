@@ -1,9 +1,9 @@
-import plotly.express as px
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
-import streamlit as st
-import plotly.graph_objects as go
+from aggregates import country_profiles, medal_cube, medal_summary
+from background import Stage, show_animated, show_chart, show_metrics, show_staged
+from result_cache import memoize
+from spec_store import stored
+from specs import FigureSpec, render
 
 def determine_most_participated_sport(df, country):
     """
@@ -16,16 +16,8 @@ def determine_most_participated_sport(df, country):
     Returns:
         str: The most participated sport for the given country.
     """
-    # Group the DataFrame by 'country_name' and 'discipline_title' and count the occurrences
-    country_sport_count = df.groupby(['country_name', 'discipline_title']).size().reset_index(name='participation_count')
-
-    # Pivot the DataFrame to have 'country_name' as the index and 'discipline_title' as the columns
-    pivot_df = pd.pivot_table(country_sport_count, index='country_name', columns='discipline_title', values='participation_count', fill_value=0)
-
-    # Determine the most participated sport for the given country
-    most_participated_sport = pivot_df.loc[country].idxmax()
-
-    return most_participated_sport
+    # Read it from the precomputed country profile
+    return country_profiles(df).at[country, 'most_participated_sport']
 
 def determine_best_medals_by_discipline(df, country):
     """
@@ -38,71 +30,126 @@ def determine_best_medals_by_discipline(df, country):
     Returns:
         pandas.DataFrame: A DataFrame showing the countries with the best overall medal count in each discipline.
     """
-    # Group the DataFrame by 'country_name', 'discipline_title', and 'medal_type' and count the occurrences
-    medal_count = df.groupby(['country_name', 'discipline_title', 'medal_type']).size().reset_index(name='medal_count')
+    # Read the disciplines the country leads from the precomputed country profile
+    profile = country_profiles(df).loc[country]
+    return pd.DataFrame({
+        'country_name': country,
+        'discipline_title': list(profile['led_disciplines']),
+        'medal_count': list(profile['led_medal_counts']),
+    })
+
+
+def country_ranking(df):
+    """
+    Rank all countries by gold, then silver, then bronze medals.
 
-    # Determine the total medal count for each country in each discipline
-    total_medals = medal_count.groupby(['country_name', 'discipline_title'])['medal_count'].sum().reset_index()
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
 
-    # Determine the country with the best overall medal count in each discipline
-    best_medals_country = total_medals.groupby('discipline_title')['medal_count'].idxmax()
-    country_best_medals_df = total_medals.loc[best_medals_country, ['country_name', 'discipline_title', 'medal_count']]
-    country_best_medals_df.sort_values(by='country_name', inplace=True)
+    Returns:
+        pandas.DataFrame: The country profiles, best ranked first.
+    """
+    return country_profiles(df).sort_values(['rank', 'total_medals'], ascending=[True, False], kind='stable')
 
-    return country_best_medals_df[country_best_medals_df['country_name']==country]
 
-def country_analysis(df,country):
-# Assuming df is your DataFrame
-    most_participated_sport = determine_most_participated_sport(df, country)
+def country_summary(df, country):
+    """
+    Return the headline numbers of a country from its precomputed profile.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        country (str): The country name.
+
+    Returns:
+        dict: 'Rank', 'Medals', 'Gold' and 'Most participated sport'.
+    """
+    profile = country_profiles(df).loc[country]
+    return {
+        'Rank': int(profile['rank']),
+        'Medals': int(profile['total_medals']),
+        'Gold': int(profile['GOLD']),
+        'Most participated sport': profile['most_participated_sport'],
+    }
+
+@memoize
+def country_analysis_spec(df,country):
+    """
+    Compute the spec of country_analysis_figure.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        country (str): The country name.
+
+    Returns:
+        FigureSpec: The participants of the country's most participated sport next to
+        the disciplines where it has the most medals.
+    """
+# Look up the country in the precomputed profiles
+    profile = country_profiles(df).loc[country]
+    most_participated_sport = profile['most_participated_sport']
     country_best_medals = determine_best_medals_by_discipline(df, country)
 
-# Calculate the count of participants for the most participated sport
-    participants_count = df[df['discipline_title'] == most_participated_sport].groupby('country_name').size().get(country, 0)
-
-    fig = go.Figure()
-
-# Add a bar for the most participated sport
-    fig.add_trace(go.Bar(
-        x=[most_participated_sport],
-        y=[participants_count],
-        name='Most Participated Sport',
-        marker_color='blue',
-        text=[participants_count],
-        textposition='auto',
-        hovertemplate=f"Discipline: {most_participated_sport}<br>Participants: {participants_count}",
-        showlegend=True
-    ))
-
-# Add bars for the disciplines with the highest medal count
-    for _, row in country_best_medals.iterrows():
-        discipline = row['discipline_title']
-        medals_count = row['medal_count']
-        fig.add_trace(go.Bar(
-            x=[discipline],
-            y=[medals_count],
-            name=f'Highest Medal Count - {discipline}',
-            marker_color='green',
-            text=[medals_count],
-            textposition='auto',
-            hovertemplate=f"Discipline: {discipline}<br>Medals: {medals_count}",
-            showlegend=True
-        ))
-
-# Update the layout
-    fig.update_layout(
-        title=f"Sports Analysis for {country}",
-        xaxis_title='Discipline',
-        yaxis_title='Count',
-        showlegend=True,
-        barmode='group'
-    )
-
-# Show the interactive plot
-    st.plotly_chart(fig)
+# The count of participants for the most participated sport
+    participants_count = int(profile['participants'])
+
+# A bar for the most participated sport
+    traces = [{
+        'type': 'bar',
+        'x': [most_participated_sport],
+        'y': [participants_count],
+        'name': 'Most Participated Sport',
+        'marker_color': 'blue',
+        'text': [participants_count],
+        'textposition': 'auto',
+        'hovertemplate': f"Discipline: {most_participated_sport}<br>Participants: {participants_count}",
+        'showlegend': True,
+    }]
+
+# Bars for the disciplines with the highest medal count
+    for discipline, medals_count in zip(country_best_medals['discipline_title'], country_best_medals['medal_count']):
+        traces.append({
+            'type': 'bar',
+            'x': [discipline],
+            'y': [medals_count],
+            'name': f'Highest Medal Count - {discipline}',
+            'marker_color': 'green',
+            'text': [medals_count],
+            'textposition': 'auto',
+            'hovertemplate': f"Discipline: {discipline}<br>Medals: {medals_count}",
+            'showlegend': True,
+        })
+
+    layout = {
+        'title': f"Sports Analysis for {country}",
+        'xaxis_title': 'Discipline',
+        'yaxis_title': 'Count',
+        'showlegend': True,
+        'barmode': 'group',
+    }
+    return FigureSpec(traces, layout)
+
+
+def country_analysis_figure(df,country):
+    """
+    Draw country_analysis_spec.
+    """
+    return render(country_analysis_spec(df, country))
+
+
+def country_analysis(df,country):
+    """
+    Show the country's headline numbers and country_analysis_figure in the Streamlit page,
+    each as soon as it is ready.
+    """
+    show_staged([
+        Stage('summary', country_summary, (df, country), show_metrics),
+        Stage('chart', country_analysis_figure, (df, country), show_chart),
+    ])
 
 
 
 
+@memoize(scope={'country_name': 'country_name'})
 def track_country_performance(df, country_name, discipline_title):
     """
     Track the performance of a country for a given discipline across all slug games.
@@ -115,78 +162,81 @@ def track_country_performance(df, country_name, discipline_title):
     Returns:
         pandas.DataFrame: A DataFrame with the total medals won for the given country and discipline in each slug game.
     """
-    # Filter the DataFrame for the specified country and discipline
-    filtered_df = df[(df['country_name'] == country_name) & (df['discipline_title'] == discipline_title)]
+    # Slice the aggregate cube to the specified country and discipline
+    medals = medal_cube(df).rollup('slug_game', 'medal_type', country_name=country_name, discipline_title=discipline_title)
 
-    # Group the filtered DataFrame by 'slug_game' and calculate the total medals won
-    grouped_df = filtered_df.groupby('slug_game')['medal_type'].count().reset_index(name='total_medals')
+    # Sum the medals of each slug game
+    grouped_df = medals.groupby(level='slug_game').sum().reset_index(name='total_medals')
 
     return grouped_df
 
 
-def create_slider_plot(df, country_name, discipline_title):
+@memoize(scope={'country_name': 'country_name'})
+@stored
+def create_slider_plot_spec(df, country_name, discipline_title):
     """
-    Create a Plotly visualization with a slider for tracking the performance of a country in a discipline across slug games.
+    Compute the spec of create_slider_plot_figure.
 
     Parameters:
         df (pandas.DataFrame): The DataFrame containing the data.
         country_name (str): The country name to track performance.
         discipline_title (str): The discipline title to track performance.
+
+    Returns:
+        FigureSpec: The total medals of the first slug game, animated over all of them.
     """
     # Track the performance of the country for the given discipline across all slug games
     performance_df = track_country_performance(df, country_name, discipline_title)
 
-    # Create a figure
-    fig = go.Figure()
-
-    # Add an initial bar trace for the first slug game
-    fig.add_trace(go.Bar(
-        x=[performance_df['slug_game'].values[0]],
-        y=[performance_df['total_medals'].values[0]],
-        name='Total Medals',
-    ))
-
-    # Set the layout
-    fig.update_layout(
-        title=f'Performance of {country_name} in {discipline_title} as per total medal count',
-        xaxis_title='Slug Game',
-        yaxis_title='Total Medals',
-        barmode='stack',
-    )
-
-    # Add a slider
-    fig.update_layout(
-        sliders=[
-            {
-                'currentvalue': {'prefix': 'Slug Game: '},
-                'steps': [
-                    {'method': 'animate', 'args': [[f'frame{i}']] ,'label': f'{game}'} for i, game in enumerate(performance_df['slug_game'])
-                ],
-                'transition': {'duration': 500, 'easing': 'linear'},
-                'x': 0.1, 'len': 0.9,
-                'y': 0, 'yanchor': 'top',
-                'pad': {'t': 50, 'b': 10},
-                'active': 0,
-            }
-        ],
-    )
+    # An initial bar trace for the first slug game
+    traces = [{
+        'type': 'bar',
+        'x': [performance_df['slug_game'].values[0]],
+        'y': [performance_df['total_medals'].values[0]],
+        'name': 'Total Medals',
+    }]
+
+    layout = {
+        'title': f'Performance of {country_name} in {discipline_title} as per total medal count',
+        'xaxis_title': 'Slug Game',
+        'yaxis_title': 'Total Medals',
+        'barmode': 'stack',
+    }
+
+    # One frame for each slug game
+    animation = {
+        'labels': performance_df['slug_game'],
+        'traces': [(performance_df['total_medals'], {})],
+    }
+    return FigureSpec(traces, layout, animation)
+
+
+def create_slider_plot_figure(df, country_name, discipline_title, frames=True):
+    """
+    Create a Plotly visualization with a slider for tracking the performance of a country in a discipline across slug games.
 
-    # Add frames for each slug game
-    frames = []
-    for i, slug_game in enumerate(performance_df['slug_game']):
-        frame = go.Frame(
-            name=f'frame{i}',
-            data=[go.Bar(x=[slug_game], y=[performance_df.loc[performance_df['slug_game'] == slug_game, 'total_medals'].values[0]])]
-        )
-        frames.append(frame)
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        country_name (str): The country name to track performance.
+        discipline_title (str): The discipline title to track performance.
+        frames (bool): Whether to add the slider and animation frames.
 
-    fig.frames = frames
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(create_slider_plot_spec(df, country_name, discipline_title), frames)
 
-    # Show the interactive plot
-    st.plotly_chart(fig)
+
+def create_slider_plot(df, country_name, discipline_title):
+    """
+    Show create_slider_plot_figure in the Streamlit page: the headline numbers first,
+    then the chart, then its animation.
+    """
+    show_animated(create_slider_plot_figure, (df, country_name, discipline_title), medal_summary)
 
     
 #MEDAL COUNT DISTRIBUTION
+@memoize(scope={'country_name': 'country_name'})
 def track_performance(df, country_name, discipline_title):
     """
     Track the performance of a country for a given discipline across all slug games.
@@ -199,87 +249,83 @@ def track_performance(df, country_name, discipline_title):
     Returns:
         pandas.DataFrame: A DataFrame with the total medals won for the given country and discipline in each slug game.
     """
-    # Filter the DataFrame for the specified country and discipline
-    filtered_df = df[(df['country_name'] == country_name) & (df['discipline_title'] == discipline_title)]
+    # Slice the aggregate cube to the specified country and discipline
+    cube = medal_cube(df)
+    medals = cube.rollup('slug_game', 'medal_type', country_name=country_name, discipline_title=discipline_title)
 
-    # Group the filtered DataFrame by 'slug_game' and calculate the total medals won
-    grouped_df = filtered_df.groupby('slug_game')['medal_type'].value_counts().unstack(fill_value=0)
+    # Spread the medal types into columns, one row per slug game, keeping types the country never won
+    grouped_df = medals.unstack(fill_value=0).reindex(columns=cube.categories['medal_type'], fill_value=0)
 
     return grouped_df
 
 
-def create(df, country_name, discipline_title):
+@memoize(scope={'country_name': 'country_name'})
+def create_spec(df, country_name, discipline_title):
     """
-    Create a Plotly visualization with a slider for tracking the performance of a country in a discipline across slug games.
+    Compute the spec of create_figure.
 
     Parameters:
         df (pandas.DataFrame): The DataFrame containing the data.
         country_name (str): The country name to track performance.
         discipline_title (str): The discipline title to track performance.
+
+    Returns:
+        FigureSpec: The medals of every slug game stacked by medal type, animated over the slug games.
     """
     # Track the performance of the country for the given discipline across all slug games
     performance_df = track_performance(df, country_name, discipline_title)
 
-    # Create a figure
-    fig = go.Figure()
-
-    # Add bar traces for each medal type
-    for medal_type in ['GOLD', 'SILVER', 'BRONZE']:
-        fig.add_trace(go.Bar(
-            x=performance_df.index,
-            y=performance_df[medal_type],
-            name=medal_type.capitalize(),
-        ))
-
-    # Set the layout
-    fig.update_layout(
-        title=f'Performance of {country_name} in {discipline_title} as per medal distribution',
-        xaxis_title='Slug Game',
-        yaxis_title='Total Medals',
-        barmode='stack',
-    )
-
-    # Add a slider
-    fig.update_layout(
-        sliders=[
-            {
-                'currentvalue': {'prefix': 'Slug Game: '},
-                'steps': [
-                    {'method': 'animate', 'args': [[f'frame{i}']] ,'label': f'{game}'} for i, game in enumerate(performance_df.index)
-                ],
-                'transition': {'duration': 500, 'easing': 'linear'},
-                'x': 0.1, 'len': 0.9,
-                'y': 0, 'yanchor': 'top',
-                'pad': {'t': 50, 'b': 10},
-                'active': 0,
-            }
+    # Bar traces for each medal type
+    traces = [
+        {'type': 'bar', 'x': performance_df.index, 'y': performance_df[medal_type], 'name': medal_type.capitalize()}
+        for medal_type in ['GOLD', 'SILVER', 'BRONZE']
+    ]
+
+    layout = {
+        'title': f'Performance of {country_name} in {discipline_title} as per medal distribution',
+        'xaxis_title': 'Slug Game',
+        'yaxis_title': 'Total Medals',
+        'barmode': 'stack',
+    }
+
+    # One frame for each slug game
+    animation = {
+        'labels': performance_df.index,
+        'traces': [
+            (performance_df['GOLD'], {'name': 'Gold', 'marker': {'color': 'gold'}}),
+            (performance_df['SILVER'], {'name': 'Silver', 'marker': {'color': 'silver'}}),
+            (performance_df['BRONZE'], {'name': 'Bronze', 'marker': {'color': 'peru'}}),
         ],
-    )
-
-    # Add frames for each slug game
-    frames = []
-    for i, slug_game in enumerate(performance_df.index):
-        frame_data = [
-            go.Bar(x=[slug_game], y=[performance_df.loc[slug_game, 'GOLD']], name='Gold', marker=dict(color='gold')),
-            go.Bar(x=[slug_game], y=[performance_df.loc[slug_game, 'SILVER']], name='Silver', marker=dict(color='silver')),
-            go.Bar(x=[slug_game], y=[performance_df.loc[slug_game, 'BRONZE']], name='Bronze', marker=dict(color='peru'))
-        ]
-        frame = go.Frame(
-            name=f'frame{i}',
-            data=frame_data
-        )
-        frames.append(frame)
-
-    fig.frames = frames
-
-    # Show the interactive plot
-    fig.show()
+    }
+    return FigureSpec(traces, layout, animation)
 
-#COMPARE MEDAL PERFORMANCE BTW 2 COUNTRIES IN SMAE DISCIPLINE
 
-import pandas as pd
-import plotly.graph_objects as go
+def create_figure(df, country_name, discipline_title, frames=True):
+    """
+    Create a Plotly visualization with a slider for tracking the performance of a country in a discipline across slug games.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        country_name (str): The country name to track performance.
+        discipline_title (str): The discipline title to track performance.
+        frames (bool): Whether to add the slider and animation frames.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(create_spec(df, country_name, discipline_title), frames)
 
+
+def create(df, country_name, discipline_title):
+    """
+    Show create_figure in the Streamlit page: the headline numbers first, then the
+    chart, then its animation.
+    """
+    show_animated(create_figure, (df, country_name, discipline_title), medal_summary)
+
+#COMPARE MEDAL PERFORMANCE BTW 2 COUNTRIES IN SMAE DISCIPLINE
+
+@memoize(scope={'country_name': 'country_name'})
 def tr_performance(df, country_name, discipline_title):
     """
     Track the performance of a country for a given discipline across all slug games.
@@ -292,24 +338,29 @@ def tr_performance(df, country_name, discipline_title):
     Returns:
         pandas.DataFrame: A DataFrame with the total medals won for the given country and discipline in each slug game.
     """
-    # Filter the DataFrame for the specified country and discipline
-    filtered_df = df[(df['country_name'] == country_name) & (df['discipline_title'] == discipline_title)]
+    # Slice the aggregate cube to the specified country and discipline
+    medals = medal_cube(df).rollup('slug_game', 'medal_type', country_name=country_name, discipline_title=discipline_title)
 
-    # Group the filtered DataFrame by 'slug_game' and calculate the total medals won
-    grouped_df = filtered_df.groupby('slug_game')['medal_type'].count().reset_index(name='total_medals')
+    # Sum the medals of each slug game
+    grouped_df = medals.groupby(level='slug_game').sum().reset_index(name='total_medals')
 
     return grouped_df
 
 
-def cr_slider_plot(df, country1_name, country2_name, discipline_title):
+@memoize(scope={'country1_name': 'country_name', 'country2_name': 'country_name'})
+def cr_slider_plot_spec(df, country1_name, country2_name, discipline_title):
     """
-    Create a Plotly visualization with a slider for tracking the performance of two countries in a discipline across slug games.
+    Compute the spec of cr_slider_plot_figure.
 
     Parameters:
         df (pandas.DataFrame): The DataFrame containing the data.
         country1_name (str): The name of the first country.
         country2_name (str): The name of the second country.
         discipline_title (str): The discipline title to track performance.
+
+    Returns:
+        FigureSpec: The total medals of both countries side by side, animated over the
+        slug games where both medalled.
     """
     # Track the performance of the first country for the given discipline across all slug games
     performance_country1 = track_country_performance(df, country1_name, discipline_title)
@@ -320,63 +371,67 @@ def cr_slider_plot(df, country1_name, country2_name, discipline_title):
     # Merge the performance DataFrames to include all slug games
     performance_combined = performance_country1.merge(performance_country2, on='slug_game', suffixes=('_country1', '_country2'))
 
-    # Create a figure
-    fig = go.Figure()
-
-    # Add initial bar traces for the first slug game
-    fig.add_trace(go.Bar(
-        x=[performance_combined['slug_game'].values[0]],
-        y=[performance_combined['total_medals_country1'].values[0]],
-        name=country1_name,
-        marker_color='blue',
-        offsetgroup=0,
-    ))
-    fig.add_trace(go.Bar(
-        x=[performance_combined['slug_game'].values[0]],
-        y=[performance_combined['total_medals_country2'].values[0]],
-        name=country2_name,
-        marker_color='green',
-        offsetgroup=1,
-    ))
-
-    # Set the layout
-    fig.update_layout(
-        title=f'Performance of {country1_name} vs {country2_name} in {discipline_title}',
-        xaxis_title='Slug Game',
-        yaxis_title='Total Medals',
-        barmode='group',
-    )
-
-    # Add a slider
-    fig.update_layout(
-        sliders=[
-            {
-                'currentvalue': {'prefix': 'Slug Game: '},
-                'steps': [
-                    {'method': 'animate', 'args': [[f'frame{i}']], 'label': game} for i, game in enumerate(performance_combined['slug_game'])
-                ],
-                'transition': {'duration': 500, 'easing': 'linear'},
-                'x': 0.1, 'len': 0.9,
-                'y': 0, 'yanchor': 'top',
-                'pad': {'t': 50, 'b': 10},
-                'active': 0,
-            }
+    # Initial bar traces for the first slug game
+    traces = [
+        {
+            'type': 'bar',
+            'x': [performance_combined['slug_game'].values[0]],
+            'y': [performance_combined['total_medals_country1'].values[0]],
+            'name': country1_name,
+            'marker_color': 'blue',
+            'offsetgroup': 0,
+        },
+        {
+            'type': 'bar',
+            'x': [performance_combined['slug_game'].values[0]],
+            'y': [performance_combined['total_medals_country2'].values[0]],
+            'name': country2_name,
+            'marker_color': 'green',
+            'offsetgroup': 1,
+        },
+    ]
+
+    layout = {
+        'title': f'Performance of {country1_name} vs {country2_name} in {discipline_title}',
+        'xaxis_title': 'Slug Game',
+        'yaxis_title': 'Total Medals',
+        'barmode': 'group',
+    }
+
+    # One frame for each slug game
+    animation = {
+        'labels': performance_combined['slug_game'],
+        'traces': [
+            (performance_combined['total_medals_country1'], {'name': country1_name, 'marker': {'color': 'blue'}, 'offsetgroup': 0}),
+            (performance_combined['total_medals_country2'], {'name': country2_name, 'marker': {'color': 'green'}, 'offsetgroup': 1}),
         ],
-    )
-
-    # Add frames for each slug game
-    frames = []
-    for i, slug_game in enumerate(performance_combined['slug_game']):
-        frame = go.Frame(
-            name=f'frame{i}',
-            data=[
-                go.Bar(x=[slug_game], y=[performance_combined.loc[performance_combined['slug_game'] == slug_game, 'total_medals_country1'].values[0]], name=country1_name, marker_color='blue', offsetgroup=0),
-                go.Bar(x=[slug_game], y=[performance_combined.loc[performance_combined['slug_game'] == slug_game, 'total_medals_country2'].values[0]], name=country2_name, marker_color='green', offsetgroup=1),
-            ],
-        )
-        frames.append(frame)
-
-    fig.frames = frames
-
-    # Show the interactive plot
-    fig.show()
\ No newline at end of file
+    }
+    return FigureSpec(traces, layout, animation)
+
+
+def cr_slider_plot_figure(df, country1_name, country2_name, discipline_title, frames=True):
+    """
+    Create a Plotly visualization with a slider for tracking the performance of two countries in a discipline across slug games.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        country1_name (str): The name of the first country.
+        country2_name (str): The name of the second country.
+        discipline_title (str): The discipline title to track performance.
+        frames (bool): Whether to add the slider and animation frames.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(cr_slider_plot_spec(df, country1_name, country2_name, discipline_title), frames)
+
+
+def cr_slider_plot(df, country1_name, country2_name, discipline_title):
+    """
+    Show cr_slider_plot_figure in the Streamlit page: the headline numbers first, then
+    the chart, then its animation.
+    """
+    show_animated(
+        cr_slider_plot_figure, (df, country1_name, country2_name, discipline_title),
+        medal_summary, (df, [country1_name, country2_name], discipline_title),
+    )
\ No newline at end of file
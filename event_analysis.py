@@ -1,11 +1,119 @@
-import plotly.express as px
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
-import streamlit as st
-import plotly.graph_objects as go
 import numpy as np
+from aggregates import medal_cube
+from background import Stage, show_chart, show_staged
+from result_cache import memoize
+from spec_store import stored
+from specs import FigureSpec, render
 
+# event_gender values counted as mixed competition
+MIXED_GENDERS = ['Mixed', 'Open']
+
+# Periods the orientation can be broken down by
+PERIODS = ('slug_game', 'decade')
+
+
+def _period_codes(slugs, period):
+    """
+    Map every slug game category to the code of its period, periods in chronological order.
+
+    Parameters:
+        slugs (pandas.Index): The slug game categories, each ending in its year.
+        period (str): 'slug_game' or 'decade'.
+
+    Returns:
+        tuple: The period code of every slug game, and the period labels.
+    """
+    years = slugs.str[-4:].astype(int).to_numpy()
+    if period == 'decade':
+        decades, codes = np.unique(years // 10 * 10, return_inverse=True)
+        return codes, pd.Index(decades, name='decade')
+
+    # Order the Games by year, then by slug (summer and winter Games share some years)
+    order = np.lexsort((slugs.to_numpy(), years))
+    codes = np.empty(len(slugs), dtype=np.int64)
+    codes[order] = np.arange(len(slugs))
+    return codes, pd.Index(slugs[order], name='slug_game')
+
+
+@memoize
+def gender_orientation(df, period=None):
+    """
+    Compute the gender balance of every discipline, overall or per Games or decade.
+
+    All groups are counted in one pass over the cells of the aggregate cube and
+    classified with vectorized comparisons, so the cost depends on the number of
+    cells and not on the number of rows. The male and female proportions are taken
+    over single-sex events; disciplines (or periods) with mixed events only are 'Mixed'.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        period (str): None for the whole history, 'slug_game' or 'decade'.
+
+    Returns:
+        pandas.DataFrame: Indexed by discipline_title (and the period), with the Men, Women
+        and Mixed counts, total_competitors (Men + Women), the male, female and mixed
+        proportions and the orientation.
+    """
+    cube = medal_cube(df)
+    keys = cube.keys
+    disciplines = cube.categories['discipline_title']
+    discipline_codes = keys[:, cube.dimensions.index('discipline_title')].astype(np.int64)
+
+    # Column of every event_gender code: 0 Men, 1 Women, 2 Mixed; the trailing slot takes missing values
+    genders = cube.categories['event_gender']
+    columns = np.select([genders == 'Men', genders == 'Women', genders.isin(MIXED_GENDERS)], [0, 1, 2], default=-1)
+    gender_columns = np.append(columns, -1)[keys[:, cube.dimensions.index('event_gender')]]
+
+    if period is None:
+        period_codes, periods = np.zeros(len(keys), dtype=np.int64), None
+    elif period in PERIODS:
+        slug_codes, periods = _period_codes(cube.categories['slug_game'], period)
+        period_codes = np.append(slug_codes, -1)[keys[:, cube.dimensions.index('slug_game')]]
+    else:
+        raise ValueError(f'Unknown period: {period}')
+
+    # Count every (discipline, period, gender column) in one bincount
+    valid = (discipline_codes >= 0) & (period_codes >= 0) & (gender_columns >= 0)
+    period_count = 1 if periods is None else len(periods)
+    groups = discipline_codes[valid] * period_count + period_codes[valid]
+    cells, inverse = np.unique(groups, return_inverse=True)
+    counts = np.bincount(inverse * 3 + gender_columns[valid], weights=cube.counts[valid], minlength=len(cells) * 3)
+    men, women, mixed = counts.reshape(len(cells), 3).astype(np.int64).T
+
+    # Proportions and orientation, all as array operations
+    single = men + women
+    with np.errstate(divide='ignore', invalid='ignore'):
+        male_proportion = men / single
+        female_proportion = women / single
+        mixed_proportion = mixed / (single + mixed)
+    orientation = np.select(
+        [male_proportion > 0.5, female_proportion > 0.5, male_proportion == female_proportion, single == 0],
+        ['Male-Oriented', 'Female-Oriented', 'Balanced', 'Mixed'],
+        default=None,
+    )
+
+    if periods is None:
+        index = disciplines.take(cells).rename('discipline_title')
+    else:
+        index = pd.MultiIndex(
+            levels=[pd.Index(disciplines), periods],
+            codes=[cells // period_count, cells % period_count],
+            names=['discipline_title', periods.name],
+        )
+    return pd.DataFrame({
+        'Men': men,
+        'Women': women,
+        'Mixed': mixed,
+        'total_competitors': single,
+        'male_proportion': male_proportion,
+        'female_proportion': female_proportion,
+        'mixed_proportion': mixed_proportion,
+        'orientation': orientation,
+    }, index=index)
+
+
+@memoize
 def analyze_gender_orientation(df):
     """
     Analyze the gender orientation of disciplines based on the proportion of male and female competitors.
@@ -14,41 +122,58 @@ def analyze_gender_orientation(df):
         df (pandas.DataFrame): The DataFrame containing the data.
 
     Returns:
-        pandas.DataFrame: The DataFrame with the gender orientation analysis for each discipline.
+        tuple: The balanced, male-oriented and female-oriented disciplines, as slices of gender_orientation(df).
     """
-    # Remove rows with null values in the 'event_gender' column
-    df = df.dropna(subset=['event_gender'])
+    orientation_df = gender_orientation(df)
+    orientation = orientation_df['orientation']
+    return (
+        orientation_df[orientation == 'Balanced'],
+        orientation_df[orientation == 'Male-Oriented'],
+        orientation_df[orientation == 'Female-Oriented'],
+    )
 
-    # Group the DataFrame by 'discipline_title' and 'event_gender'
-    grouped_df = df.groupby(['discipline_title', 'event_gender']).size().reset_index(name='competitor_count')
 
-    # Pivot the DataFrame to get the count of male and female competitors for each discipline
-    pivot_df = grouped_df.pivot(index='discipline_title', columns='event_gender', values='competitor_count')
+@memoize
+def plot_gender_orientation_spec(filtered_df, male_df, female_df):
+    """
+    Compute the spec of plot_gender_orientation_figure.
 
-    # Calculate the proportion of male and female competitors for each discipline
-    pivot_df['total_competitors'] = pivot_df['Men'].fillna(0) + pivot_df['Women'].fillna(0)
-    pivot_df['male_proportion'] = pivot_df['Men'].fillna(0) / pivot_df['total_competitors']
-    pivot_df['female_proportion'] = pivot_df['Women'].fillna(0) / pivot_df['total_competitors']
+    Parameters:
+        filtered_df (pandas.DataFrame): The DataFrame containing the filtered disciplines.
+        male_df (pandas.DataFrame): The DataFrame containing the male-oriented disciplines.
+        female_df (pandas.DataFrame): The DataFrame containing the female-oriented disciplines.
 
-    # Categorize disciplines based on gender orientation
-    conditions = [
-        (pivot_df['male_proportion'] > 0.5),
-        (pivot_df['female_proportion'] > 0.5),
-        (pivot_df['male_proportion'] == pivot_df['female_proportion']),
-        (pivot_df['Men'].isna() & pivot_df['Women'].notna()),
-        (pivot_df['Women'].isna() & pivot_df['Men'].notna())
+    Returns:
+        FigureSpec: A scatter of the total competitors of every discipline, one trace per orientation.
+    """
+    # A scatter trace for each gender orientation
+    traces = [
+        {
+            'type': 'scatter',
+            'x': orientation_df.index,
+            'y': orientation_df['total_competitors'],
+            'mode': 'markers',
+            'hovertemplate': f'<b>Discipline:</b> %{{x}}<br><b>Orientation:</b> {name}',
+            'marker': dict(color=color, symbol='circle', size=10),
+            'name': name,
+        }
+        for orientation_df, name, color in [
+            (filtered_df, 'Balanced', 'black'),
+            (male_df, 'Male-Oriented', 'blue'),
+            (female_df, 'Female-Oriented', 'pink'),
+        ]
     ]
-    choices = ['Male-Oriented', 'Female-Oriented', 'Balanced', 'Female-Oriented', 'Male-Oriented']
-    pivot_df['orientation'] = pd.Series(np.select(conditions, choices, default=None), index=pivot_df.index)
 
-    # Filter in 'Balanced' disciplines
-    filtered_df = pivot_df[(pivot_df['orientation'] == 'Balanced')]
-    male_df = pivot_df[~pivot_df['orientation'].isin(['Balanced', 'Female-Oriented'])]
-    female_df= pivot_df[~pivot_df['orientation'].isin(['Balanced', 'Male-Oriented'])]
-    return filtered_df,male_df,female_df
+    layout = {
+        'title': 'Gender Orientation of Disciplines',
+        'xaxis_title': 'Discipline',
+        'yaxis_title': 'Total Competitors',
+        'showlegend': True,
+    }
+    return FigureSpec(traces, layout)
 
 
-def plot_gender_orientation(filtered_df, male_df, female_df):
+def plot_gender_orientation_figure(filtered_df, male_df, female_df):
     """
     Plot the gender orientation of disciplines using Plotly.
 
@@ -56,54 +181,124 @@ def plot_gender_orientation(filtered_df, male_df, female_df):
         filtered_df (pandas.DataFrame): The DataFrame containing the filtered disciplines.
         male_df (pandas.DataFrame): The DataFrame containing the male-oriented disciplines.
         female_df (pandas.DataFrame): The DataFrame containing the female-oriented disciplines.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
     """
-    # Create a scatter plot with labels for the gender orientations
-    fig = go.Figure()
-
-    # Add a scatter trace for balanced orientation
-    fig.add_trace(
-        go.Scatter(
-            x=filtered_df.index,
-            y=filtered_df['total_competitors'],
-            mode='markers',
-            hovertemplate='<b>Discipline:</b> %{x}<br><b>Orientation:</b> Balanced',
-            marker=dict(color='black', symbol='circle', size=10),
-            name='Balanced'
-        )
-    )
+    return render(plot_gender_orientation_spec(filtered_df, male_df, female_df))
 
-    # Add a scatter trace for male orientation
-    fig.add_trace(
-        go.Scatter(
-            x=male_df.index,
-            y=male_df['total_competitors'],
-            mode='markers',
-            hovertemplate='<b>Discipline:</b> %{x}<br><b>Orientation:</b> Male-Oriented',
-            marker=dict(color='blue', symbol='circle', size=10),
-            name='Male-Oriented'
-        )
-    )
 
-    # Add a scatter trace for female orientation
-    fig.add_trace(
-        go.Scatter(
-            x=female_df.index,
-            y=female_df['total_competitors'],
-            mode='markers',
-            hovertemplate='<b>Discipline:</b> %{x}<br><b>Orientation:</b> Female-Oriented',
-            marker=dict(color='pink', symbol='circle', size=10),
-            name='Female-Oriented'
-        )
-    )
+def plot_gender_orientation(filtered_df, male_df, female_df):
+    """
+    Show plot_gender_orientation_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', plot_gender_orientation_figure, (filtered_df, male_df, female_df), show_chart)])
 
-    # Update the layout
-    fig.update_layout(
-        title='Gender Orientation of Disciplines',
-        xaxis_title='Discipline',
-        yaxis_title='Total Competitors',
-        showlegend=True
-    )
 
-    # Show the interactive plot
-    st.plotly_chart(fig)
+@memoize
+@stored
+def gender_orientation_spec(df):
+    """
+    Compute the spec of the overall gender orientation chart straight from the dataset.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        FigureSpec: The spec of plot_gender_orientation_figure for analyze_gender_orientation(df).
+    """
+    return plot_gender_orientation_spec(*analyze_gender_orientation(df))
+
+
+def dataset_gender_orientation_figure(df):
+    """
+    Draw gender_orientation_spec.
+    """
+    return render(gender_orientation_spec(df))
+
+
+def plot_dataset_gender_orientation(df):
+    """
+    Show the overall gender orientation chart of the dataset in the Streamlit page, off
+    the script thread.
+    """
+    show_staged([Stage('chart', dataset_gender_orientation_figure, (df,), show_chart)])
+
+
+@memoize
+def plot_orientation_over_time_spec(orientation_df):
+    """
+    Compute the spec of plot_orientation_over_time_figure.
+
+    Parameters:
+        orientation_df (pandas.DataFrame): A per-period result of gender_orientation.
+
+    Returns:
+        FigureSpec: A discipline x period heatmap of the share of women.
+    """
+    period = orientation_df.index.names[1]
+    female_share = orientation_df['female_proportion'].unstack(period)
+    orientation = orientation_df['orientation'].unstack(period)
+
+    traces = [{
+        'type': 'heatmap',
+        'x': female_share.columns.astype(str),
+        'y': female_share.index,
+        'z': female_share.to_numpy(),
+        'customdata': orientation.to_numpy(),
+        'zmin': 0,
+        'zmax': 1,
+        'colorscale': [[0, 'blue'], [0.5, 'white'], [1, 'pink']],
+        'colorbar': dict(title='Share of women'),
+        'hovertemplate': '<b>Discipline:</b> %{y}<br><b>Period:</b> %{x}<br><b>Share of women:</b> %{z:.0%}<br><b>Orientation:</b> %{customdata}<extra></extra>',
+    }]
+
+    layout = {
+        'title': 'Gender Orientation of Disciplines over Time',
+        'xaxis_title': 'Decade' if period == 'decade' else 'Slug Game',
+        'yaxis_title': 'Discipline',
+        'height': max(400, 18 * len(female_share.index)),
+    }
+    return FigureSpec(traces, layout)
 
+
+def plot_orientation_over_time_figure(orientation_df):
+    """
+    Plot the share of women in the single-sex events of every discipline over time as a heatmap.
+
+    Parameters:
+        orientation_df (pandas.DataFrame): A per-period result of gender_orientation.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(plot_orientation_over_time_spec(orientation_df))
+
+
+def plot_orientation_over_time(orientation_df):
+    """
+    Show plot_orientation_over_time_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', plot_orientation_over_time_figure, (orientation_df,), show_chart)])
+
+
+def orientation_over_time_figure(df, period):
+    """
+    Draw plot_orientation_over_time_figure for the gender orientation of a dataset per period.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        period (str): One of PERIODS.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return plot_orientation_over_time_figure(gender_orientation(df, period))
+
+
+def orientation_over_time(df, period):
+    """
+    Compute the gender orientation of a dataset per period and show it as
+    plot_orientation_over_time does, both off the script thread.
+    """
+    show_staged([Stage('chart', orientation_over_time_figure, (df, period), show_chart)])
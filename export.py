@@ -0,0 +1,160 @@
+"""
+Stream query results and analysis tables to CSV, Parquet or Arrow IPC files.
+
+Rows are encoded one chunk at a time, so writing an export holds at most one chunk
+of the result in memory. Nothing is built until the user actually clicks a download
+button, but Streamlit then reads the whole file into memory to serve it, so in-app
+downloads stop after MAX_DOWNLOAD_ROWS rows. The API's /export endpoint streams
+results of any size.
+"""
+import tempfile
+
+import streamlit as st
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - CSV exports work without pyarrow
+    pa = None
+
+from query import pages
+
+# Rows encoded at a time
+CHUNK_ROWS = 100_000
+
+# The most rows a download button exports
+MAX_DOWNLOAD_ROWS = 250_000
+
+# Joins the items of tuple and list cells (e.g. a ranking's led disciplines) in CSV files
+LIST_SEPARATOR = '; '
+
+# Format name -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+
+def available_formats():
+    """
+    Return the export formats usable here; Parquet and Arrow need pyarrow.
+    """
+    return list(FORMATS) if pa is not None else ['csv']
+
+
+def frame_chunks(frame, chunk_rows=CHUNK_ROWS):
+    """
+    Yield a DataFrame (e.g. an analysis table) in slices of chunk_rows rows.
+    """
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def query_chunks(df, sort_by=None, ascending=True, columns=None, chunk_rows=CHUNK_ROWS, **predicates):
+    """
+    Yield the rows matching every predicate in chunks, as query.pages does.
+    """
+    return pages(df, chunk_rows, sort_by, ascending, columns, **predicates)
+
+
+def head_chunks(chunks, max_rows):
+    """
+    Yield chunks until max_rows rows have been yielded, cutting the last one short.
+    """
+    for chunk in chunks:
+        yield chunk.iloc[:max_rows]
+        max_rows -= len(chunk)
+        if max_rows <= 0:
+            return
+
+
+def flatten(chunk):
+    """
+    Turn named index levels (slug_game, country_name, ...) into columns; plain row labels are dropped.
+    """
+    if any(name is not None for name in chunk.index.names):
+        return chunk.reset_index()
+    return chunk
+
+
+def join_lists(chunk):
+    """
+    Turn the tuple and list cells of object columns into LIST_SEPARATOR-joined strings.
+    """
+    columns = {}
+    for name in chunk.columns[chunk.dtypes == object]:
+        values = chunk[name]
+        if values.map(lambda value: isinstance(value, (tuple, list))).any():
+            columns[name] = values.map(lambda value: LIST_SEPARATOR.join(map(str, value)) if isinstance(value, (tuple, list)) else value)
+    return chunk.assign(**columns) if columns else chunk
+
+
+def write(chunks, file, fmt='csv'):
+    """
+    Encode DataFrame chunks into a binary file, one chunk at a time.
+
+    Parameters:
+        chunks (iterable): DataFrames with the same columns, in output order.
+        file (file object): The binary file to write to.
+        fmt (str): 'csv', 'parquet' or 'arrow' (the Arrow IPC file format).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported export format: {fmt}')
+
+    if fmt == 'csv':
+        for i, chunk in enumerate(chunks):
+            file.write(join_lists(flatten(chunk)).to_csv(index=False, header=i == 0).encode())
+        return
+
+    if pa is None:
+        raise ValueError(f'Exporting to {fmt} needs pyarrow')
+    schema = None
+    writer = None
+    try:
+        for chunk in chunks:
+            # Later chunks are cast to the first one's schema, e.g. an all-missing column stays a string column
+            table = pa.Table.from_pandas(flatten(chunk), schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(file, schema) if fmt == 'parquet' else pa.ipc.new_file(file, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_file(chunks, fmt='csv'):
+    """
+    Write chunks to an anonymous temporary file and return it, rewound for reading.
+
+    The file is deleted as soon as it is closed.
+    """
+    file = tempfile.TemporaryFile()
+    write(chunks, file, fmt)
+    file.seek(0)
+    return file
+
+
+def download(label, make_chunks, name, key, max_rows=MAX_DOWNLOAD_ROWS):
+    """
+    Show one download button per export format for a result.
+
+    The buttons do not rerun the page when clicked, so they also work below results
+    that are only shown right after an st.button click. Streamlit keeps the whole
+    file in memory while serving it, so only the first max_rows rows are exported.
+
+    Parameters:
+        label (str): The label of the download buttons.
+        make_chunks (callable): Returns the chunks to export; only called on click.
+        name (str): The file name, without extension.
+        key (str): A widget key prefix, unique on the page.
+        max_rows (int): The most rows exported.
+    """
+    formats = available_formats()
+    for column, fmt in zip(st.columns(len(formats)), formats):
+        extension, mime = FORMATS[fmt]
+        column.download_button(
+            f'{label} ({fmt})', lambda fmt=fmt: export_file(head_chunks(make_chunks(), max_rows), fmt),
+            file_name=f'{name}{extension}', mime=mime, on_click='ignore', key=f'{key}-{fmt}',
+        )
@@ -0,0 +1,91 @@
+import functools
+import threading
+import uuid
+import weakref
+
+_registry = {}
+_lock = threading.Lock()
+
+
+def _store(key, df, value):
+    with _lock:
+        _registry[key] = (weakref.ref(df, lambda _ref: _registry.pop(key, None)), value)
+
+
+def per_frame(builder):
+    """
+    Memoize a structure derived from a DataFrame for as long as that DataFrame lives.
+
+    DataFrames are unhashable, so entries are keyed on the builder and the frame's id
+    and dropped by a weakref callback when the frame is garbage collected. Threads
+    asking for a structure that is being built wait for that build instead of
+    starting their own.
+
+    Parameters:
+        builder (callable): A function taking a DataFrame and returning the derived structure.
+
+    Returns:
+        callable: The memoized builder, with set(df, value) and cached(df) (the
+        structure, or None when it is not built) helpers.
+    """
+    build_lock = threading.RLock()
+
+    def cached(df):
+        entry = _registry.get((builder.__qualname__, id(df)))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        return None
+
+    @functools.wraps(builder)
+    def wrapper(df):
+        value = cached(df)
+        if value is not None:
+            return value
+
+        with build_lock:
+            value = cached(df)
+            if value is None:
+                value = builder(df)
+                _store((builder.__qualname__, id(df)), df, value)
+        return value
+
+    wrapper.set = lambda df, value: _store((builder.__qualname__, id(df)), df, value)
+    wrapper.cached = cached
+    return wrapper
+
+
+@per_frame
+def frame_version(df):
+    """
+    Return a token identifying the contents of a DataFrame.
+
+    Frames get a random token unless their owner sets one (see Dataset_prep), so
+    results cached for one frame are never served for another.
+    """
+    return uuid.uuid4().hex
+
+
+@per_frame
+def key_versions(df):
+    """
+    Return the versions of the slices of a DataFrame.
+
+    Returns:
+        dict: (column, value) -> token for the slices changed since the frame's
+        lineage was first loaded, plus None -> the token of every other slice.
+    """
+    return {None: frame_version(df)}
+
+
+def slice_version(df, column, value):
+    """
+    Return a token that changes whenever the rows with `column == value` change.
+
+    Appending rows (see Dataset_prep.append_games) gives the frame a new version
+    but leaves the slices it did not touch on their old token, so results that
+    only read those slices stay valid. A list of values gives one token per value.
+    """
+    versions = key_versions(df)
+    if isinstance(value, (list, tuple)):
+        return tuple(versions.get((column, item), versions[None]) for item in value)
+    return versions.get((column, value), versions[None])
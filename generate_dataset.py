@@ -0,0 +1,180 @@
+"""
+Generate synthetic medals data with the schema of medals.csv, at any size.
+
+Every row copies the event columns (discipline, Games, event, gender, medal,
+participant type and team, country) of a randomly drawn medals.csv row, so the
+joint distribution of disciplines, countries, Games and events is reproduced
+exactly. Athletes are synthetic: each country gets a pool of made-up names built
+from the real first and last names, sized like the real athlete/row ratio, and
+rows whose source row had no athlete (team entries) keep a null
+athlete_full_name and athlete_url.
+
+Output is written in chunks, so memory stays bounded from 10^5 to 10^8 rows.
+
+Usage:
+    python generate_dataset.py synthetic.csv --rows 1000000
+    python generate_dataset.py synthetic.parquet --rows 100000000 --chunk-size 2000000
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medals.csv')
+
+CHUNK_SIZE = 1_000_000
+
+ATHLETE_URL_PREFIX = 'https://olympics.com/en/athletes/'
+
+# Columns copied from the sampled source row
+TEMPLATE_COLUMNS = [
+    'discipline_title',
+    'slug_game',
+    'event_title',
+    'event_gender',
+    'medal_type',
+    'participant_type',
+    'participant_title',
+    'country_name',
+    'country_code',
+    'country_3_letter_code',
+]
+
+COLUMNS = TEMPLATE_COLUMNS[:7] + ['athlete_url', 'athlete_full_name'] + TEMPLATE_COLUMNS[7:]
+
+
+class MedalsModel:
+    """
+    The empirical distributions of a medals frame, ready to sample from.
+    """
+
+    def __init__(self, raw):
+        self.templates = raw[TEMPLATE_COLUMNS].astype('category')
+        self.has_athlete = raw['athlete_full_name'].notna().to_numpy()
+        self.has_url = raw['athlete_url'].notna().to_numpy()
+
+        # Split the real names into first-name and surname pools
+        names = raw['athlete_full_name'].dropna().unique()
+        parts = pd.Series(names).str.rsplit(' ', n=1, expand=True).dropna()
+        self.first_names = np.sort(parts[0].unique())
+        self.last_names = np.sort(parts[1].unique())
+
+        # Distinct athletes per athlete row in the real data, and each country's share of them
+        self.athletes_per_row = len(names) / max(self.has_athlete.sum(), 1)
+        country_codes = self.templates['country_name'].cat.codes.to_numpy()
+        self.country_share = np.bincount(country_codes[self.has_athlete], minlength=len(self.templates['country_name'].cat.categories))
+        self.country_share = self.country_share / self.country_share.sum()
+
+    def athlete_pools(self, rows):
+        """
+        Return (offset, size) arrays of each country's slice of the athlete id space.
+        """
+        sizes = np.maximum(np.ceil(self.country_share * rows * self.athletes_per_row), 1).astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        return offsets, sizes
+
+    def athlete_names(self, ids):
+        """
+        Map athlete ids to names deterministically, scattering neighbouring ids over the pools.
+        """
+        first = self.first_names[(ids * 2654435761) % len(self.first_names)]
+        last = self.last_names[(ids * 40503 + ids // len(self.first_names)) % len(self.last_names)]
+        return np.char.add(np.char.add(first.astype(str), ' '), last.astype(str))
+
+
+def generate(rows, chunk_size=CHUNK_SIZE, seed=0, source=SOURCE_PATH):
+    """
+    Yield synthetic medals frames in chunks.
+
+    Parameters:
+        rows (int): The total number of rows to generate.
+        chunk_size (int): The number of rows per chunk.
+        seed (int): The random seed; the same seed always gives the same data.
+        source (str): The CSV whose distributions are reproduced.
+
+    Yields:
+        pandas.DataFrame: Chunks with the columns of medals.csv.
+    """
+    model = MedalsModel(pd.read_csv(source))
+    rng = np.random.default_rng(seed)
+    offsets, sizes = model.athlete_pools(rows)
+    country_codes = model.templates['country_name'].cat.codes.to_numpy()
+
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        picks = rng.integers(0, len(model.templates), count)
+        chunk = model.templates.take(picks).reset_index(drop=True)
+
+        # Draw every athlete row from its country's pool and name only the distinct ids
+        countries = country_codes[picks]
+        ids = offsets[countries] + (rng.random(count) * sizes[countries]).astype(np.int64)
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        unique_names = model.athlete_names(unique_ids)
+        unique_urls = np.char.add(ATHLETE_URL_PREFIX, np.char.replace(np.char.lower(unique_names), ' ', '-'))
+
+        has_athlete = model.has_athlete[picks]
+        has_url = has_athlete & model.has_url[picks]
+        chunk['athlete_full_name'] = pd.Series(unique_names[inverse], dtype=object).where(has_athlete)
+        chunk['athlete_url'] = pd.Series(unique_urls[inverse], dtype=object).where(has_url)
+        yield chunk[COLUMNS]
+
+
+def generate_frame(rows, seed=0, source=SOURCE_PATH):
+    """
+    Generate a synthetic medals frame in memory.
+
+    Parameters:
+        rows (int): The number of rows.
+        seed (int): The random seed.
+        source (str): The CSV whose distributions are reproduced.
+
+    Returns:
+        pandas.DataFrame: A frame with the columns of medals.csv.
+    """
+    return pd.concat(generate(rows, seed=seed, source=source), ignore_index=True)
+
+
+def write(path, rows, chunk_size=CHUNK_SIZE, seed=0, source=SOURCE_PATH):
+    """
+    Stream a synthetic dataset to a CSV or Parquet file (chosen by extension).
+
+    Parameters:
+        path (str): The output file, ending in .csv or .parquet.
+        rows (int): The total number of rows.
+        chunk_size (int): The number of rows generated and written at a time.
+        seed (int): The random seed.
+        source (str): The CSV whose distributions are reproduced.
+    """
+    chunks = generate(rows, chunk_size, seed, source)
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column, pa.string()) for column in COLUMNS])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk.astype('string'), schema=schema, preserve_index=False))
+    elif path.endswith('.csv'):
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    else:
+        raise ValueError(f'Unsupported output format: {path}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='output file (.csv or .parquet)')
+    parser.add_argument('--rows', type=float, default=1e6, help='number of rows, e.g. 1e7')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=SOURCE_PATH)
+    args = parser.parse_args(argv)
+
+    write(args.path, int(args.rows), args.chunk_size, args.seed, args.source)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
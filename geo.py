@@ -1,79 +1,173 @@
-import plotly.express as px
+import functools
+import os
+
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
-import streamlit as st
+import plotly.express as px
+from aggregates import medal_cube
+from background import Stage, show_chart, show_staged
+from frame_cache import per_frame
+from result_cache import memoize
+from spec_store import stored
+from specs import FigureSpec, render
+
+COUNTRY_CODES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country_codes.csv')
+
+# Disciplines shown on the 'Top Disciplines' map
+TOP_DISCIPLINES = ['Athletics', 'Swimming', 'Wrestling', 'Rowing', 'Boxing']
+
+
+@functools.lru_cache(maxsize=None)
+def country_codes():
+    """
+    Load the local country name to ISO 3166-1 alpha-3 table.
+
+    The table is keyed on the harmonized names only: the aliases merged into them
+    by Dataset_prep.harmonize_countries never reach the maps. Delegations with no
+    country (Independent Olympic Athletes, MIX, ...) have no code and are left off
+    the maps.
+
+    Returns:
+        dict: Country name to ISO alpha-3 code.
+    """
+    table = pd.read_csv(COUNTRY_CODES_PATH, keep_default_na=False)
+    table = table[table['iso_alpha3'] != '']
+    return dict(zip(table['country_name'], table['iso_alpha3']))
+
+
+@per_frame
+def geo_table(df):
+    """
+    Precompute the per-country medal vectors used by the three geo views.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        pandas.DataFrame: One row per mappable country with its ISO code, Gold/Silver/Bronze
+        and Total Medals counts, the TOP_DISCIPLINES counts (NaN when none) and their sum.
+    """
+    cube = medal_cube(df)
+
+    # Medal counts per country, one column per medal type
+    medals = cube.rollup('country_name', 'medal_type').unstack(fill_value=0)
+    table = pd.DataFrame({
+        'Gold': medals.get('GOLD', 0),
+        'Silver': medals.get('SILVER', 0),
+        'Bronze': medals.get('BRONZE', 0),
+    }, index=medals.index)
+    table['Total Medals'] = medals.sum(axis=1)
+
+    # Medal counts in the top disciplines, NaN where a country never medalled in one
+    disciplines = cube.rollup('country_name', 'discipline_title', discipline_title=TOP_DISCIPLINES).unstack()
+    table = table.join(disciplines.reindex(columns=TOP_DISCIPLINES))
+    table['Top Disciplines'] = table[TOP_DISCIPLINES].sum(axis=1)
+
+    # Resolve names to ISO codes once, so the maps never match names client-side
+    table['iso_alpha3'] = table.index.map(country_codes())
+    table = table.dropna(subset=['iso_alpha3'])
+    return table.rename_axis('country_name').reset_index()
+
+
+def _choropleth_spec(df, color, title, hover_data=None):
+    # Only the columns the map reads are handed to Plotly Express
+    columns = ['country_name', 'iso_alpha3', color] + list(hover_data or [])
+    table = geo_table(df)[list(dict.fromkeys(columns))]
+    fig = px.choropleth(table, locations='iso_alpha3', locationmode='ISO-3', color=color,
+                        color_continuous_scale='YlGnBu', title=title, hover_name='country_name',
+                        hover_data=hover_data)
+
+    # Keep the expanded traces and layout, so rendering never runs Plotly Express again.
+    # Trace values are read back as arrays rather than their JSON encoding, and the
+    # template is dropped: it is the default one render() applies anyway
+    traces = [{key: trace[key] for key in trace.to_plotly_json()} for trace in fig.data]
+    layout = fig.layout.to_plotly_json()
+    layout.pop('template', None)
+    return FigureSpec(traces, layout)
+
+
+@memoize
+@stored
+def geo_spec(df):
+    """
+    Compute the spec of geo_figure.
+    """
+    return _choropleth_spec(df, 'Total Medals', 'Total Medals by Country')
+
+
+def geo_figure(df):
+    """
+    Create a choropleth map of the total number of medals won by each country.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(geo_spec(df))
+
 
 def geo(df):
-# Group the DataFrame by country_name and medal_type, and calculate the total number of medals
-    grouped = df.groupby(['country_name', 'medal_type']).size().unstack().reset_index()
+    """
+    Show geo_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', geo_figure, (df,), show_chart)])
 
-# Calculate the total number of medals for each country
-    grouped['Total Medals'] = grouped.sum(axis=1)
 
-# Create a choropleth map using Plotly
-    fig = px.choropleth(grouped, 
-                        locations='country_name', 
-                        locationmode='country names',
-                        color='Total Medals',
-                        color_continuous_scale='YlGnBu',
-                        title='Total Medals by Country',
-                        hover_name='country_name')
+@memoize
+@stored
+def create_choropleth_map_spec(df):
+    """
+    Compute the spec of create_choropleth_map_figure.
+    """
+    return _choropleth_spec(df, 'Total Medals', 'Individual Medals won by each Country', ['Gold', 'Silver', 'Bronze'])
 
-# Display the interactive plot
-    st.plotly_chart(fig)
-    
-#   
+
+def create_choropleth_map_figure(df):
+    """
+    Create a choropleth map of the total medals won by each country, with the gold,
+    silver and bronze counts on hover.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(create_choropleth_map_spec(df))
 
 
 def create_choropleth_map(df):
-    # Group the DataFrame by country_name and medal_type, and calculate the total number of medals
-    grouped = df.groupby(['country_name', 'medal_type']).size().unstack().reset_index()
+    """
+    Show create_choropleth_map_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', create_choropleth_map_figure, (df,), show_chart)])
+
 
-    # Create separate columns for gold, silver, and bronze counts
-    grouped['Gold'] = grouped['GOLD']
-    grouped['Silver'] = grouped['SILVER']
-    grouped['Bronze'] = grouped['BRONZE']
+@memoize
+@stored
+def geo_dis_spec(df):
+    """
+    Compute the spec of geo_dis_figure.
+    """
+    return _choropleth_spec(df, 'Top Disciplines', 'Top 5 Disciplines by Country', TOP_DISCIPLINES)
 
-    grouped['Total Medals'] = grouped[['Gold', 'Silver', 'Bronze']].sum(axis=1)
 
-    # Create a choropleth map using Plotly
-    fig = px.choropleth(grouped, 
-                        locations='country_name', 
-                        locationmode='country names',
-                        color='Total Medals',
-                        color_continuous_scale='YlGnBu',
-                        title='Individual Medals won by each Country',
-                        hover_name='country_name',
-                        hover_data=['Gold', 'Silver', 'Bronze'])
+def geo_dis_figure(df):
+    """
+    Create a choropleth map of the medals won by each country in the TOP_DISCIPLINES.
 
-    # Display the interactive plot
-    st.plotly_chart(fig)
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
 
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(geo_dis_spec(df))
 
 
 def geo_dis(df):
-# Group the DataFrame by country_name and medal_type, and calculate the total number of medals
-    grouped = df.groupby(['country_name', 'discipline_title']).size().unstack().reset_index()
-    grouped['discipline_title']=grouped['Athletics']
-    grouped['discipline_title']=grouped['Swimming']
-    grouped['discipline_title']=grouped['Wrestling']
-    grouped['discipline_title']=grouped['Rowing']
-    grouped['discipline_title']=grouped['Boxing']
-
-# Calculate the total number of medals for each country
-    grouped['discipline_title'] = grouped[['Athletics','Swimming','Wrestling','Rowing','Boxing']].sum(axis=1)
-
-# Create a choropleth map using Plotly
-    fig = px.choropleth(grouped, 
-                        locations='country_name', 
-                        locationmode='country names',
-                        color='discipline_title',
-                        color_continuous_scale='YlGnBu',
-                        title='Top 5 Disciplines by Country',
-                        hover_name='country_name',
-                        hover_data=['Athletics','Swimming','Wrestling','Rowing','Boxing'])
-                        
-
-# Display the interactive plot
-    st.plotly_chart(fig)
\ No newline at end of file
+    """
+    Show geo_dis_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', geo_dis_figure, (df,), show_chart)])
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Measure how long each app module takes to import and how much memory it pulls in.
+
+Every module is imported in a fresh interpreter with -X importtime, so the numbers
+are cold-start costs and do not depend on what was imported before.
+
+Usage:
+    python import_report.py [module ...]
+"""
+import os
+import subprocess
+import sys
+
+# Modules the app imports at startup, then the page modules it imports on demand
+MODULES = [
+    'streamlit',
+    'Dataset_prep',
+    'search',
+    'about',
+    'event_analysis',
+    'medal_analysis',
+    'player_analysis',
+    'country_analysis',
+    'geo',
+]
+
+# Print the peak resident set size (kilobytes on Linux) after the import
+_PROBE = 'import {module}, resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+
+
+def measure(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Parameters:
+        module (str): The module to import.
+
+    Returns:
+        dict: The cumulative import time in ms, the peak RSS in MB and the five
+        slowest packages it imported (by self time).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((int(self_us), int(cumulative_us), name.strip()))
+
+    total_us = next((cumulative for _self, cumulative, name in timings if name == module), 0)
+    slowest = sorted(timings, reverse=True)[:5]
+    return {
+        'import_ms': total_us / 1000,
+        'peak_rss_mb': int(result.stdout.split()[-1]) / 1024,
+        'slowest': [(name, self_us / 1000) for self_us, _cumulative, name in slowest],
+    }
+
+
+def main(modules):
+    baseline = measure('sys')
+    print(f"{'module':<20}{'import ms':>12}{'RSS MB':>10}  slowest packages (self ms)")
+    for module in modules:
+        report = measure(module)
+        slowest = ', '.join(f'{name} {ms:.0f}' for name, ms in report['slowest'])
+        print(f"{module:<20}{report['import_ms']:>12.1f}{report['peak_rss_mb'] - baseline['peak_rss_mb']:>10.1f}  {slowest}")
+    print(f"RSS is measured above a bare interpreter ({baseline['peak_rss_mb']:.1f} MB).")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or MODULES)
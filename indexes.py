@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import per_frame
+
+# Lookup keys used by the pages, each mapped to the columns it is built on
+INDEX_KEYS = {
+    'country': ('country_name',),
+    'discipline': ('discipline_title',),
+    'game': ('slug_game',),
+    'athlete': ('athlete_full_name',),
+    'country_discipline': ('country_name', 'discipline_title'),
+}
+
+
+class RowIndex:
+    """
+    Map every value (or tuple of values) of some columns to the positions of the rows holding it.
+
+    Row positions are kept sorted by key, with rows of equal key in their original
+    order, so a lookup is two binary searches plus a slice.
+    """
+
+    def __init__(self, columns, labels, sorted_keys, positions_by_key):
+        self.columns = tuple(columns)
+        self.labels = labels
+        # Shift codes by one so missing values (-1) never match a lookup
+        self.shape = tuple(len(labels) + 1 for labels in self.labels)
+        self.sorted_keys = sorted_keys
+        self.positions_by_key = positions_by_key
+
+    @classmethod
+    def from_frame(cls, df, columns):
+        """
+        Index the rows of a DataFrame on some of its columns.
+
+        Parameters:
+            df (pandas.DataFrame): The DataFrame containing the data.
+            columns (tuple): The columns making up the key.
+
+        Returns:
+            RowIndex: The populated index.
+        """
+        labels = []
+        codes = []
+        for column in columns:
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                labels.append(values.cat.categories)
+                codes.append(values.cat.codes.to_numpy(np.int64))
+            else:
+                column_codes, uniques = pd.factorize(values, sort=True)
+                labels.append(pd.Index(uniques))
+                codes.append(column_codes.astype(np.int64))
+
+        shape = tuple(len(column_labels) + 1 for column_labels in labels)
+        keys = np.ravel_multi_index([code + 1 for code in codes], shape)
+        positions_by_key = np.argsort(keys, kind='stable')
+        return cls(columns, labels, keys[positions_by_key], positions_by_key)
+
+    def extend(self, rows, offset):
+        """
+        Return an index over the indexed rows plus new rows placed after them.
+
+        Only the new rows are sorted; they are merged into the existing order by
+        binary search, after their equal keys so ties keep row order. The labels
+        stay sorted, so the existing keys keep their relative order when they are
+        re-expressed over the grown label sets.
+
+        Parameters:
+            rows (pandas.DataFrame): The new rows, holding the indexed columns.
+            offset (int): The position of the first new row in the combined frame.
+
+        Returns:
+            RowIndex: The index of the combined frame.
+        """
+        labels = []
+        old_codes = np.unravel_index(self.sorted_keys, self.shape)
+        remapped = []
+        new_codes = []
+        for column, column_labels, codes in zip(self.columns, self.labels, old_codes):
+            values = rows[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                value_codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                value_codes, uniques = pd.factorize(values)
+            merged, label_codes = _merge_labels(column_labels, uniques)
+            labels.append(merged)
+            remapped.append(np.append(-1, label_codes)[codes] + 1)
+            new_codes.append(np.append(merged.searchsorted(uniques), -1)[value_codes].astype(np.int64) + 1)
+
+        shape = tuple(len(column_labels) + 1 for column_labels in labels)
+        old_keys = np.ravel_multi_index(remapped, shape)
+        keys = np.ravel_multi_index(new_codes, shape)
+        order = np.argsort(keys, kind='stable')
+        slots = np.searchsorted(old_keys, keys[order], side='right')
+        return RowIndex(
+            self.columns,
+            labels,
+            np.insert(old_keys, slots, keys[order]),
+            np.insert(self.positions_by_key, slots, order + offset),
+        )
+
+    def positions(self, *values):
+        """
+        Return the row positions whose columns equal the given values.
+
+        Parameters:
+            *values: One value per indexed column.
+
+        Returns:
+            numpy.ndarray: The matching row positions in ascending order.
+        """
+        codes = []
+        for labels, value in zip(self.labels, values):
+            try:
+                codes.append(labels.get_loc(value) + 1)
+            except (KeyError, TypeError):
+                return self.positions_by_key[:0]
+
+        key = np.ravel_multi_index(codes, self.shape)
+        start, stop = np.searchsorted(self.sorted_keys, [key, key + 1])
+        return self.positions_by_key[start:stop]
+
+
+def _merge_labels(labels, values):
+    """
+    Insert unseen values into sorted labels by binary search, without re-sorting or hashing the labels.
+
+    Returns:
+        tuple: The merged labels and the new code of every old label.
+    """
+    values = pd.Index(values).unique().sort_values()
+    slots = labels.searchsorted(values)
+    found = slots < len(labels)
+    found[found] = labels[slots[found]] == values[found]
+    missing, slots = values[~found], slots[~found]
+
+    codes = np.arange(len(labels))
+    if not len(missing):
+        return labels, codes
+    merged = pd.Index(np.insert(labels.to_numpy(), slots, missing.to_numpy()), dtype=labels.dtype)
+    return merged, codes + np.searchsorted(slots, codes, side='right')
+
+
+@per_frame
+def row_indexes(df):
+    """
+    Return the secondary indexes for a DataFrame, building them on first use.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        dict: Index name from INDEX_KEYS to its RowIndex.
+    """
+    return {name: RowIndex.from_frame(df, columns) for name, columns in INDEX_KEYS.items()}
@@ -1,10 +1,10 @@
-import plotly.express as px
-import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
-import streamlit as st
-import plotly.graph_objects as go
+from aggregates import medal_cube, medal_summary
+from background import Stage, show_animated, show_table
+from result_cache import memoize
+from spec_store import stored
+from specs import FigureSpec, render
 
+@memoize(scope={'country_name': 'country_name'})
 def track_country_performance(df, country_name, discipline_title):
     """
     Track the performance of a country for a given discipline across all slug games.
@@ -17,86 +17,86 @@ def track_country_performance(df, country_name, discipline_title):
     Returns:
         pandas.DataFrame: A DataFrame with the total medals won for the given country and discipline in each slug game.
     """
-    # Filter the DataFrame for the specified country and discipline
-    filtered_df = df[(df['country_name'] == country_name) & (df['discipline_title'] == discipline_title)]
+    # Slice the aggregate cube to the specified country and discipline
+    cube = medal_cube(df)
+    medals = cube.rollup('slug_game', 'medal_type', country_name=country_name, discipline_title=discipline_title)
 
-    # Group the filtered DataFrame by 'slug_game' and calculate the total medals won
-    grouped_df = filtered_df.groupby('slug_game')['medal_type'].value_counts().unstack(fill_value=0)
+    # Spread the medal types into columns, one row per slug game, keeping types the country never won
+    grouped_df = medals.unstack(fill_value=0).reindex(columns=cube.categories['medal_type'], fill_value=0)
 
     return grouped_df
 
 
-def create_slider_plot(df, country_name, discipline_title):
+@memoize(scope={'country_name': 'country_name'})
+@stored
+def create_slider_plot_spec(df, country_name, discipline_title):
     """
-    Create a Plotly visualization with a slider for tracking the performance of a country in a discipline across slug games.
+    Compute the spec of create_slider_plot_figure.
 
     Parameters:
         df (pandas.DataFrame): The DataFrame containing the data.
         country_name (str): The country name to track performance.
         discipline_title (str): The discipline title to track performance.
+
+    Returns:
+        FigureSpec: The medals of every slug game stacked by medal type, animated over the slug games.
     """
     # Track the performance of the country for the given discipline across all slug games
 
     performance_df = track_country_performance(df, country_name, discipline_title)
 
-    # Create a figure
-    fig = go.Figure()
-
-    # Add bar traces for each medal type
-    for medal_type in ['GOLD', 'SILVER', 'BRONZE']:
-        fig.add_trace(go.Bar(
-            x=performance_df.index,
-            y=performance_df[medal_type],
-            name=medal_type.capitalize(),
-        ))
-
-    # Set the layout
-    fig.update_layout(
-        title=f'Performance of {country_name} in {discipline_title} as per medal distribution',
-        xaxis_title='Slug Game',
-        yaxis_title='Total Medals',
-        barmode='stack',
-    )
-
-    # Add a slider
-    fig.update_layout(
-        sliders=[
-            {
-                'currentvalue': {'prefix': 'Slug Game: '},
-                'steps': [
-                    {'method': 'animate', 'args': [[f'frame{i}']] ,'label': f'{game}'} for i, game in enumerate(performance_df.index)
-                ],
-                'transition': {'duration': 500, 'easing': 'linear'},
-                'x': 0.1, 'len': 0.9,
-                'y': 0, 'yanchor': 'top',
-                'pad': {'t': 50, 'b': 10},
-                'active': 0,
-            }
+    # Bar traces for each medal type
+    traces = [
+        {'type': 'bar', 'x': performance_df.index, 'y': performance_df[medal_type], 'name': medal_type.capitalize()}
+        for medal_type in ['GOLD', 'SILVER', 'BRONZE']
+    ]
+
+    layout = {
+        'title': f'Performance of {country_name} in {discipline_title} as per medal distribution',
+        'xaxis_title': 'Slug Game',
+        'yaxis_title': 'Total Medals',
+        'barmode': 'stack',
+    }
+
+    # One frame for each slug game
+    animation = {
+        'labels': performance_df.index,
+        'traces': [
+            (performance_df['GOLD'], {'name': 'Gold', 'marker': {'color': 'gold'}}),
+            (performance_df['SILVER'], {'name': 'Silver', 'marker': {'color': 'silver'}}),
+            (performance_df['BRONZE'], {'name': 'Bronze', 'marker': {'color': 'peru'}}),
         ],
-    )
+    }
+    return FigureSpec(traces, layout, animation)
 
-    # Add frames for each slug game
-    frames = []
-    for i, slug_game in enumerate(performance_df.index):
-        frame_data = [
-            go.Bar(x=[slug_game], y=[performance_df.loc[slug_game, 'GOLD']], name='Gold', marker=dict(color='gold')),
-            go.Bar(x=[slug_game], y=[performance_df.loc[slug_game, 'SILVER']], name='Silver', marker=dict(color='silver')),
-            go.Bar(x=[slug_game], y=[performance_df.loc[slug_game, 'BRONZE']], name='Bronze', marker=dict(color='peru'))
-        ]
-        frame = go.Frame(
-            name=f'frame{i}',
-            data=frame_data
-        )
-        frames.append(frame)
 
-    fig.frames = frames
+def create_slider_plot_figure(df, country_name, discipline_title, frames=True):
+    """
+    Create a Plotly visualization with a slider for tracking the performance of a country in a discipline across slug games.
 
-    # Show the interactive plot
-    st.plotly_chart(fig)
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        country_name (str): The country name to track performance.
+        discipline_title (str): The discipline title to track performance.
+        frames (bool): Whether to add the slider and animation frames.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(create_slider_plot_spec(df, country_name, discipline_title), frames)
+
+
+def create_slider_plot(df, country_name, discipline_title):
+    """
+    Show create_slider_plot_figure in the Streamlit page: the headline numbers first,
+    then the chart, then its animation.
+    """
+    show_animated(create_slider_plot_figure, (df, country_name, discipline_title), medal_summary)
 
 
 
 
+@memoize(scope={'country_name': 'country_name'})
 def track_compare_performance(df, country_name, discipline_title):
     """
     Track the performance of a country for a given discipline across all slug games.
@@ -109,16 +109,154 @@ def track_compare_performance(df, country_name, discipline_title):
     Returns:
         pandas.DataFrame: A DataFrame with the total medals won for the given country and discipline in each slug game.
     """
-    # Filter the DataFrame for the specified country and discipline
-    filtered_df = df[(df['country_name'] == country_name) & (df['discipline_title'] == discipline_title)]
+    # Slice the aggregate cube to the specified country and discipline
+    medals = medal_cube(df).rollup('slug_game', 'medal_type', country_name=country_name, discipline_title=discipline_title)
 
-    # Group the filtered DataFrame by 'slug_game' and calculate the total medals won
-    grouped_df = filtered_df.groupby('slug_game')['medal_type'].count().reset_index(name='total_medals')
+    # Sum the medals of each slug game
+    grouped_df = medals.groupby(level='slug_game').sum().reset_index(name='total_medals')
 
     return grouped_df
 
 
-def compare_plot(df, country1_name, country2_name, discipline_title):
+# Bar colors of the compared countries, in selection order
+COUNTRY_COLORS = ['blue', 'green', 'red', 'orange', 'purple', 'brown', 'magenta', 'gray', 'olive', 'teal']
+
+
+def dimension_values(df, dimension):
+    """
+    Return the labels of a cube dimension that occur in the data, sorted.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        dimension (str): One of aggregates.CUBE_DIMENSIONS.
+
+    Returns:
+        list: The labels, e.g. every country for the page's multi-selects.
+    """
+    return medal_cube(df).rollup(dimension).index.tolist()
+
+
+@memoize(scope={'countries': 'country_name'})
+def compare_countries(df, countries, disciplines):
+    """
+    Count the medals of several countries in several disciplines across all slug games.
+
+    The whole (country, discipline, slug game, medal type) tensor comes out of a
+    single rollup of the aggregate cube, so comparing ten countries costs about
+    the same as comparing two.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        countries (list): The country names to compare.
+        disciplines (list): The discipline titles to compare them in.
+
+    Returns:
+        pandas.DataFrame: Indexed by country_name, discipline_title and slug_game, with one
+        column per medal type and total_medals; only Games where the country medalled appear.
+    """
+    cube = medal_cube(df)
+    medals = cube.rollup(
+        'country_name', 'discipline_title', 'slug_game', 'medal_type',
+        country_name=list(countries), discipline_title=list(disciplines),
+    )
+
+    # Spread the medal types into columns, keeping types nobody won
+    medals_df = medals.unstack('medal_type', fill_value=0).reindex(columns=cube.categories['medal_type'], fill_value=0)
+    medals_df.columns = list(medals_df.columns)
+    medals_df['total_medals'] = medals_df.sum(axis=1)
+    return medals_df
+
+
+@memoize(scope={'countries': 'country_name'})
+def compare_many_spec(df, countries, disciplines):
+    """
+    Compute the spec of compare_many_figure.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        countries (list): The country names to compare.
+        disciplines (list): The discipline titles whose medals are added up.
+
+    Returns:
+        FigureSpec: One bar per country for the first slug game, animated over every
+        slug game where at least one of the countries medalled.
+    """
+    # A country named twice is drawn once
+    countries = list(dict.fromkeys(countries))
+    medals_df = compare_countries(df, countries, disciplines)
+
+    # One row per slug game, one column per country (outer join over the Games)
+    totals = medals_df['total_medals'].groupby(level=['slug_game', 'country_name']).sum()
+    performance_combined = totals.unstack('country_name', fill_value=0).reindex(columns=countries, fill_value=0)
+    slug_games = performance_combined.index
+
+    frame_traces = [
+        (performance_combined[country], {'name': country, 'marker': {'color': COUNTRY_COLORS[i % len(COUNTRY_COLORS)]}, 'offsetgroup': i})
+        for i, country in enumerate(countries)
+    ]
+
+    # Initial bar traces for the first slug game
+    traces = [
+        {
+            'type': 'bar',
+            'x': slug_games[:1],
+            'y': values.to_numpy()[:1],
+            'name': properties['name'],
+            'marker_color': properties['marker']['color'],
+            'offsetgroup': properties['offsetgroup'],
+        }
+        for values, properties in frame_traces
+    ]
+
+    layout = {
+        'title': f"Performance of {' vs '.join(countries)} in {', '.join(disciplines)}",
+        'xaxis_title': 'Slug Game',
+        'yaxis_title': 'Total Medals',
+        'barmode': 'group',
+    }
+    return FigureSpec(traces, layout, {'labels': slug_games, 'traces': frame_traces})
+
+
+def compare_many_figure(df, countries, disciplines, frames=True):
+    """
+    Create a Plotly visualization with a slider comparing any number of countries across slug games.
+
+    Every slug game where at least one of the countries medalled is shown, with
+    zero bars for the others.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        countries (list): The country names to compare.
+        disciplines (list): The discipline titles whose medals are added up.
+        frames (bool): Whether to add the slider and animation frames.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(compare_many_spec(df, countries, disciplines), frames)
+
+
+def compare_many(df, countries, disciplines):
+    """
+    Show compare_many_figure in the Streamlit page, with the medal table per country and discipline.
+
+    The combined headline numbers come first, then the chart and the table as each is
+    ready, then the chart's animation.
+    """
+    show_animated(
+        compare_many_figure, (df, countries, disciplines), medal_summary,
+        extra=[Stage('table', medal_table, (df, countries, disciplines), show_table)],
+    )
+
+
+def medal_table(df, countries, disciplines):
+    """
+    Sum compare_countries over the slug games: one row per country and discipline.
+    """
+    return compare_countries(df, countries, disciplines).groupby(level=['country_name', 'discipline_title']).sum()
+
+
+def compare_plot_figure(df, country1_name, country2_name, discipline_title, frames=True):
     """
     Create a Plotly visualization with a slider for tracking the performance of two countries in a discipline across slug games.
 
@@ -127,73 +265,20 @@ def compare_plot(df, country1_name, country2_name, discipline_title):
         country1_name (str): The name of the first country.
         country2_name (str): The name of the second country.
         discipline_title (str): The discipline title to track performance.
+        frames (bool): Whether to add the slider and animation frames.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
     """
-    # Track the performance of the first country for the given discipline across all slug games
-    performance_country1 = track_compare_performance(df, country1_name, discipline_title)
-
-    # Track the performance of the second country for the given discipline across all slug games
-    performance_country2 = track_compare_performance(df, country2_name, discipline_title)
-
-    # Merge the performance DataFrames to include all slug games
-    performance_combined = performance_country1.merge(performance_country2, on='slug_game', suffixes=('_country1', '_country2'))
-
-    # Create a figure
-    fig = go.Figure()
-
-    # Add initial bar traces for the first slug game
-    fig.add_trace(go.Bar(
-        x=[performance_combined['slug_game'].values[0]],
-        y=[performance_combined['total_medals_country1'].values[0]],
-        name=country1_name,
-        marker_color='blue',
-        offsetgroup=0,
-    ))
-    fig.add_trace(go.Bar(
-        x=[performance_combined['slug_game'].values[0]],
-        y=[performance_combined['total_medals_country2'].values[0]],
-        name=country2_name,
-        marker_color='green',
-        offsetgroup=1,
-    ))
-
-    # Set the layout
-    fig.update_layout(
-        title=f'Performance of {country1_name} vs {country2_name} in {discipline_title}',
-        xaxis_title='Slug Game',
-        yaxis_title='Total Medals',
-        barmode='group',
-    )
+    return compare_many_figure(df, [country1_name, country2_name], [discipline_title], frames=frames)
 
-    # Add a slider
-    fig.update_layout(
-        sliders=[
-            {
-                'currentvalue': {'prefix': 'Slug Game: '},
-                'steps': [
-                    {'method': 'animate', 'args': [[f'frame{i}']], 'label': game} for i, game in enumerate(performance_combined['slug_game'])
-                ],
-                'transition': {'duration': 500, 'easing': 'linear'},
-                'x': 0.1, 'len': 0.9,
-                'y': 0, 'yanchor': 'top',
-                'pad': {'t': 50, 'b': 10},
-                'active': 0,
-            }
-        ],
-    )
 
-    # Add frames for each slug game
-    frames = []
-    for i, slug_game in enumerate(performance_combined['slug_game']):
-        frame = go.Frame(
-            name=f'frame{i}',
-            data=[
-                go.Bar(x=[slug_game], y=[performance_combined.loc[performance_combined['slug_game'] == slug_game, 'total_medals_country1'].values[0]], name=country1_name, marker_color='blue', offsetgroup=0),
-                go.Bar(x=[slug_game], y=[performance_combined.loc[performance_combined['slug_game'] == slug_game, 'total_medals_country2'].values[0]], name=country2_name, marker_color='green', offsetgroup=1),
-            ],
-        )
-        frames.append(frame)
-
-    fig.frames = frames
-
-    # Show the interactive plot
-    st.plotly_chart(fig)
\ No newline at end of file
+def compare_plot(df, country1_name, country2_name, discipline_title):
+    """
+    Show compare_plot_figure in the Streamlit page: the headline numbers first, then the
+    chart, then its animation.
+    """
+    show_animated(
+        compare_plot_figure, (df, country1_name, country2_name, discipline_title),
+        medal_summary, (df, [country1_name, country2_name], discipline_title),
+    )
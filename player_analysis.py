@@ -1,86 +1,182 @@
-import plotly.express as px
+import numpy as np
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
 import streamlit as st
-import plotly.graph_objects as go
-import seaborn as sns
+from background import Stage, show_chart, show_staged, show_table
+from indexes import row_indexes
+from query import count_by, where
+from result_cache import memoize
+from specs import FigureSpec, render
+
+@memoize(scope={'name': 'athlete_full_name'})
+def medal_count_spec(name, df):
+    """
+    Compute the spec of an athlete's medal count chart.
+
+    Parameters:
+        name (str): The athlete name.
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        FigureSpec: The athlete's medals in every slug game, stacked by medal type.
+    """
+    # Find the rows of the specific athlete and count them by 'slug_game' and 'medal_type' in place
+    positions = where(df, athlete_full_name=name)
+    grouped_df = count_by(df, positions, 'slug_game', 'medal_type').unstack().fillna(0)
+
+    # A trace for each medal type
+    traces = [
+        {'type': 'bar', 'x': grouped_df.index, 'y': grouped_df[medal_type], 'name': medal_type}
+        for medal_type in grouped_df.columns
+    ]
+
+    layout = {
+        'title': f"Medal Count by Venue Name for {name}",
+        'xaxis': {'title': 'Venue Name'},
+        'yaxis': {'title': 'Medal Count'},
+        'barmode': 'stack',
+    }
+    return FigureSpec(traces, layout)
+
+
+def create_medal_count_plot_figure(name, df):
+    """
+    Draw medal_count_spec.
+    """
+    return render(medal_count_spec(name, df))
 
-def create_medal_count_plot(name, df):
-    # Clone the DataFrame and filter for the specific athlete
-    df_clone = df.copy()
-    df_clone = df_clone.dropna(subset=['athlete_full_name'])
-    df_clone = df_clone[df_clone['athlete_full_name'] == name]
-
-    # Select the desired columns
-    filtered_df = df_clone[['slug_game', 'event_title', 'athlete_full_name', 'medal_type']]
-
-    # Group the DataFrame by 'slug_game' and 'medal_type' and count the occurrences
-    grouped_df = filtered_df.groupby(['slug_game', 'medal_type']).size().unstack().fillna(0)
-
-    # Create a list of medal types
-    medal_types = grouped_df.columns
 
-    # Create a trace for each medal type
-    traces = []
-    for medal_type in medal_types:
-        trace = go.Bar(
-            x=grouped_df.index,
-            y=grouped_df[medal_type],
-            name=medal_type
-        )
-        traces.append(trace)
-
-    # Create the layout
-    layout = go.Layout(
-        title=f"Medal Count by Venue Name for {name}",
-        xaxis=dict(title='Venue Name'),
-        yaxis=dict(title='Medal Count'),
-        barmode='stack'
-    )
+def create_medal_count_plot(name, df):
+    """
+    Show create_medal_count_plot_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', create_medal_count_plot_figure, (name, df), show_chart)])
 
-    # Create the figure
-    fig = go.Figure(data=traces, layout=layout)
 
-    # Display the interactive plot
-    st.plotly_chart(fig)
+def medal_compare_figure(name, df):
+    """
+    Draw medal_count_spec.
+    """
+    return render(medal_count_spec(name, df))
 
 
 def medal_compare(name, df):
-    # Clone the DataFrame and filter for the specific athlete
-    df_clone = df.copy()
-    df_clone = df_clone.dropna(subset=['athlete_full_name'])
-    df_clone = df_clone[df_clone['athlete_full_name'] == name]
-
-    # Select the desired columns
-    filtered_df = df_clone[['slug_game', 'event_title', 'athlete_full_name', 'medal_type']]
-
-    # Group the DataFrame by 'slug_game' and 'medal_type' and count the occurrences
-    grouped_df = filtered_df.groupby(['slug_game', 'medal_type']).size().unstack().fillna(0)
-
-    # Create a list of medal types
-    medal_types = grouped_df.columns
-
-    # Create a trace for each medal type
-    traces = []
-    for medal_type in medal_types:
-        trace = go.Bar(
-            x=grouped_df.index,
-            y=grouped_df[medal_type],
-            name=medal_type
-        )
-        traces.append(trace)
-
-    # Create the layout
-    layout = go.Layout(
-        title=f"Medal Count by Venue Name for {name}",
-        xaxis=dict(title='Venue Name'),
-        yaxis=dict(title='Medal Count'),
-        barmode='stack'
+    """
+    Show medal_compare_figure in the Streamlit page, off the script thread.
+    """
+    show_staged([Stage('chart', medal_compare_figure, (name, df), show_chart)])
+
+
+@memoize(scope={'names': 'athlete_full_name'})
+def athlete_medals(df, names):
+    """
+    Count the medals of any number of athletes in every slug game.
+
+    The rows of every athlete come from the athlete index and only their slug game
+    and medal type codes are read, so nothing is copied out of the frame and the
+    cost grows with the athletes' rows, not with the size of the frame.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        names (list): The athlete names, in display order.
+
+    Returns:
+        pandas.DataFrame: Indexed by athlete_full_name and slug_game, with one column per
+        medal type and total_medals; athletes without medals have no rows.
+    """
+    names = list(dict.fromkeys(names))
+    athlete_index = row_indexes(df)['athlete']
+    positions = [athlete_index.positions(name) for name in names]
+    athletes = np.repeat(np.arange(len(names)), [len(athlete_positions) for athlete_positions in positions])
+    positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+
+    slug_games = df['slug_game'].array
+    medal_types = df['medal_type'].array
+    slug_codes = slug_games.codes[positions].astype(np.int64)
+    medal_codes = medal_types.codes[positions].astype(np.int64)
+
+    # Count every (athlete, slug game, medal type) in one bincount
+    valid = (slug_codes >= 0) & (medal_codes >= 0)
+    game_count, medal_count = len(slug_games.categories), len(medal_types.categories)
+    cells, inverse = np.unique(athletes[valid] * game_count + slug_codes[valid], return_inverse=True)
+    counts = np.bincount(inverse * medal_count + medal_codes[valid], minlength=len(cells) * medal_count)
+    counts = counts.reshape(len(cells), medal_count)
+
+    index = pd.MultiIndex(
+        levels=[pd.Index(names), slug_games.categories],
+        codes=[cells // game_count, cells % game_count],
+        names=['athlete_full_name', 'slug_game'],
     )
+    medals_df = pd.DataFrame(counts, index=index, columns=list(medal_types.categories))
+    medals_df['total_medals'] = counts.sum(axis=1)
+    return medals_df
+
+
+@memoize(scope={'names': 'athlete_full_name'})
+def compare_athletes_spec(df, names):
+    """
+    Compute the spec of compare_athletes_figure.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        names (list): The athlete names, in display order.
+
+    Returns:
+        FigureSpec: One bar per athlete and slug game, with the medal types on hover;
+        no traces when none of the athletes won a medal.
+    """
+    names = list(dict.fromkeys(names))
+    medals_df = athlete_medals(df, names)
+
+    layout = {
+        'title': f"Medal Count by Venue Name for {', '.join(names)}",
+        'xaxis_title': 'Venue Name',
+        'yaxis_title': 'Medal Count',
+        'barmode': 'group',
+    }
+    if medals_df.empty:
+        return FigureSpec([], layout)
+
+    # Give every athlete a row for each slug game where any of them medalled
+    slug_games = medals_df.index.get_level_values('slug_game').unique().sort_values()
 
-    # Create the figure
-    fig = go.Figure(data=traces, layout=layout)
-
-    # Display the interactive plot
-    st.plotly_chart(fig)
+    traces = []
+    for name in names:
+        athlete_df = medals_df.reindex(pd.MultiIndex.from_product([[name], slug_games], names=medals_df.index.names), fill_value=0)
+        traces.append({
+            'type': 'bar',
+            'x': slug_games,
+            'y': athlete_df['total_medals'],
+            'customdata': athlete_df[['GOLD', 'SILVER', 'BRONZE']].to_numpy(),
+            'hovertemplate': '%{x}<br>Gold: %{customdata[0]}<br>Silver: %{customdata[1]}<br>Bronze: %{customdata[2]}',
+            'name': name,
+        })
+    return FigureSpec(traces, layout)
+
+
+def compare_athletes_figure(df, names):
+    """
+    Create one chart overlaying the medals of several athletes across slug games.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        names (list): The athlete names, in display order.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    return render(compare_athletes_spec(df, names))
+
+
+def compare_athletes(df, names):
+    """
+    Show compare_athletes_figure in the Streamlit page, with the combined medals table,
+    each as soon as it is ready.
+    """
+    # The index lookup is cheap, and its result is cached for the table stage
+    if athlete_medals(df, names).empty:
+        st.info("None of these athletes won a medal.")
+        return
+    show_staged([
+        Stage('chart', compare_athletes_figure, (df, names), show_chart),
+        Stage('table', athlete_medals, (df, names), show_table),
+    ])
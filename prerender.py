@@ -0,0 +1,127 @@
+"""
+Precompute the specs of the most requested views into the on-disk spec store.
+
+The popular views are the slider charts of the country and medal analysis pages for
+the countries with the most medals, each in its own top disciplines, plus the three
+geo maps and the overall gender orientation chart. Specs are computed on a process
+pool, one worker per core, and written under the dataset version (see spec_store),
+so run this after every deploy or data update. Entries of older versions are deleted
+once the run succeeds.
+
+Usage:
+    python prerender.py
+    python prerender.py --countries 10 --disciplines 5 --workers 4
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import Dataset_prep as dap
+import spec_store
+from aggregates import country_profiles, medal_cube
+from frame_cache import frame_version
+
+TOP_COUNTRIES = 30
+DISCIPLINES_PER_COUNTRY = 10
+
+# Views that do not depend on a key, as (module, spec function)
+STATIC_VIEWS = [
+    ('geo', 'geo_spec'),
+    ('geo', 'create_choropleth_map_spec'),
+    ('geo', 'geo_dis_spec'),
+    ('event_analysis', 'gender_orientation_spec'),
+]
+
+# Views drawn for a country and a discipline
+COUNTRY_DISCIPLINE_VIEWS = [
+    ('country_analysis', 'create_slider_plot_spec'),
+    ('medal_analysis', 'create_slider_plot_spec'),
+]
+
+
+def popular_views(df, countries=TOP_COUNTRIES, disciplines=DISCIPLINES_PER_COUNTRY):
+    """
+    List the views to precompute.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        countries (int): How many countries, by total medals.
+        disciplines (int): How many disciplines per country, by the country's medals in them.
+
+    Returns:
+        list: (module, spec function, arguments after the frame) tuples.
+    """
+    views = [(module, name, ()) for module, name in STATIC_VIEWS]
+
+    totals = country_profiles(df)['total_medals'].sort_values(ascending=False, kind='stable')
+    by_discipline = medal_cube(df).rollup('country_name', 'discipline_title', 'medal_type').groupby(level=[0, 1]).sum()
+    for country in totals.index[:countries]:
+        top = by_discipline.loc[country].sort_values(ascending=False, kind='stable').index[:disciplines]
+        for discipline in top:
+            views.extend((module, name, (country, discipline)) for module, name in COUNTRY_DISCIPLINE_VIEWS)
+    return views
+
+
+def _load():
+    # Every worker loads (or, when forked, inherits) the dataset once
+    dap.dset()
+
+
+def _prerender(view):
+    module, name, args = view
+    df = dap.dset()
+    try:
+        getattr(importlib.import_module(module), name).prerender(df, *args)
+    except Exception as error:
+        return frame_version(df), f'{type(error).__name__}: {error}'
+    return frame_version(df), None
+
+
+def run(workers=None, countries=TOP_COUNTRIES, disciplines=DISCIPLINES_PER_COUNTRY):
+    """
+    Precompute every popular view of the current dataset.
+
+    Parameters:
+        workers (int): The number of worker processes; one per core by default.
+        countries (int): How many countries, by total medals.
+        disciplines (int): How many disciplines per country.
+
+    Returns:
+        int: The number of views that failed.
+    """
+    start = time.perf_counter()
+    df = dap.dset()
+    version = frame_version(df)
+    views = popular_views(df, countries, disciplines)
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_load) as pool:
+        for view, (worker_version, error) in zip(views, pool.map(_prerender, views, chunksize=4)):
+            if worker_version != version:
+                error = f'the dataset changed during the run ({worker_version})'
+            if error is not None:
+                failures += 1
+                print(f'FAILED {view}: {error}', file=sys.stderr)
+
+    if not failures:
+        for stale in spec_store.prune(version):
+            print(f'Deleted the specs of dataset version {stale}', file=sys.stderr)
+    print(f'Prerendered {len(views) - failures}/{len(views)} views of dataset version {version} '
+          f'in {time.perf_counter() - start:.1f} s', file=sys.stderr)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--countries', type=int, default=TOP_COUNTRIES)
+    parser.add_argument('--disciplines', type=int, default=DISCIPLINES_PER_COUNTRY)
+    args = parser.parse_args(argv)
+    return 1 if run(args.workers, args.countries, args.disciplines) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Row filtering without copies.
+
+Predicates are answered by the secondary indexes as row positions and combined
+on those positions; unindexed columns are only read at the candidate positions.
+Callers then read just the columns they need at the final positions, so the
+memory a query allocates is proportional to its result, not to the frame.
+
+Pages of a sorted query are slices of its ordered positions, which are computed
+once per frame and query, so every page costs the same whatever its offset.
+"""
+import collections
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import per_frame
+from indexes import INDEX_KEYS, row_indexes
+
+# Rows per page of the data browser
+PAGE_SIZE = 100
+
+# Ordered queries kept per frame, least recently used dropped first
+MAX_ORDERS = 32
+
+_orders_lock = threading.Lock()
+
+# Columns answered by a secondary index, widest index first so composite keys are used when they fit
+INDEXED_COLUMNS = sorted(((columns, name) for name, columns in INDEX_KEYS.items()), key=lambda item: -len(item[0]))
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set, pd.Index, np.ndarray)) else [value]
+
+
+def where(df, **predicates):
+    """
+    Return the positions of the rows matching every predicate.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        **predicates: Column name to a value or a list of accepted values.
+
+    Returns:
+        numpy.ndarray: The matching row positions in ascending order.
+    """
+    indexes = row_indexes(df)
+    remaining = {column: _as_list(value) for column, value in predicates.items()}
+    positions = None
+
+    for columns, name in INDEXED_COLUMNS:
+        if not all(column in remaining for column in columns):
+            continue
+        keys = itertools.product(*(remaining.pop(column) for column in columns))
+        found = [indexes[name].positions(*key) for key in keys]
+        found = np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        positions = found if positions is None else np.intersect1d(positions, found, assume_unique=True)
+
+    for column, values in remaining.items():
+        # Unindexed columns are read at the candidate positions only, categoricals through their codes
+        column_values = df[column].array
+        if isinstance(column_values, pd.Categorical):
+            accepted = column_values.categories.get_indexer(values)
+            column_values, values = column_values.codes, accepted[accepted >= 0]
+        if positions is None:
+            positions = np.flatnonzero(pd.Series(column_values).isin(values).to_numpy())
+        else:
+            positions = positions[pd.Series(column_values[positions]).isin(values).to_numpy()]
+
+    return np.arange(len(df)) if positions is None else positions
+
+
+def count_by(df, positions, *columns):
+    """
+    Count the rows at some positions grouped by some columns, without taking the rows.
+
+    Rows with a missing value in any of the columns are left out, like
+    DataFrame.groupby(...).size().
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        positions (numpy.ndarray): The row positions to count, e.g. from where().
+        *columns (str): The columns to group by, in output order.
+
+    Returns:
+        pandas.Series: Counts indexed by the grouped labels, sorted by label.
+    """
+    labels = []
+    codes = []
+    for column in columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            labels.append(values.cat.categories)
+            # Categorical.codes is a view, while Series.cat.codes copies the whole column
+            codes.append(values.array.codes[positions].astype(np.int64))
+        else:
+            column_codes, uniques = pd.factorize(values.array.take(positions), sort=True)
+            labels.append(pd.Index(uniques))
+            codes.append(column_codes.astype(np.int64))
+
+    valid = np.logical_and.reduce([code >= 0 for code in codes]) if codes else np.ones(len(positions), dtype=bool)
+    shape = tuple(len(column_labels) for column_labels in labels)
+    cells, counts = np.unique(np.ravel_multi_index([code[valid] for code in codes], shape), return_counts=True)
+
+    if len(columns) == 1:
+        index = labels[0].take(cells).rename(columns[0])
+    else:
+        index = pd.MultiIndex(levels=labels, codes=np.unravel_index(cells, shape), names=list(columns))
+    return pd.Series(counts, index=index, name='count')
+
+
+def _sort_keys(df, positions, column, ascending=True):
+    # Integer ranks of the values at the positions; missing values sort last either way
+    values = df[column].array
+    if isinstance(values, pd.Categorical):
+        codes = values.codes[positions].astype(np.int64)
+        missing = len(values.categories)
+    else:
+        codes, uniques = pd.factorize(values.take(positions), sort=True)
+        codes = codes.astype(np.int64)
+        missing = len(uniques)
+    if not ascending:
+        codes = np.where(codes >= 0, missing - 1 - codes, codes)
+    return np.where(codes >= 0, codes, missing)
+
+
+@per_frame
+def _orders(df):
+    return collections.OrderedDict()
+
+
+def ordered(df, sort_by=None, ascending=True, **predicates):
+    """
+    Return the positions of the rows matching every predicate, in display order.
+
+    The result is kept with the frame, so paging through a query sorts it only once.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        sort_by (str): The column to sort by; the frame order by default. Ties keep
+            the frame order and missing values come last.
+        ascending (bool): Whether to sort in ascending order.
+        **predicates: Column name to a value or a list of accepted values.
+
+    Returns:
+        numpy.ndarray: The matching row positions, sorted.
+    """
+    key = (sort_by, ascending, tuple(sorted((column, tuple(_as_list(value))) for column, value in predicates.items())))
+    orders = _orders(df)
+    with _orders_lock:
+        if key in orders:
+            orders.move_to_end(key)
+            return orders[key]
+
+    positions = where(df, **predicates)
+    if sort_by is not None:
+        positions = positions[np.argsort(_sort_keys(df, positions, sort_by, ascending), kind='stable')]
+
+    with _orders_lock:
+        orders[key] = positions
+        while len(orders) > MAX_ORDERS:
+            orders.popitem(last=False)
+    return positions
+
+
+def page(df, offset=0, limit=PAGE_SIZE, sort_by=None, ascending=True, columns=None, **predicates):
+    """
+    Return one page of the rows matching every predicate.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        offset (int): The number of matching rows to skip.
+        limit (int): The maximum number of rows to return.
+        sort_by (str): The column to sort by; the frame order by default.
+        ascending (bool): Whether to sort in ascending order.
+        columns (list): The columns to return; all of them by default.
+        **predicates: Column name to a value or a list of accepted values.
+
+    Returns:
+        tuple: The page as a DataFrame (with the original labels) and the total number of matching rows.
+    """
+    positions = ordered(df, sort_by, ascending, **predicates)
+    frame = df if columns is None else df[columns]
+    return frame.take(positions[offset:offset + limit]), len(positions)
+
+
+def pages(df, limit=PAGE_SIZE, sort_by=None, ascending=True, columns=None, **predicates):
+    """
+    Yield the rows matching every predicate one page at a time.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        limit (int): The number of rows per page.
+        sort_by (str): The column to sort by; the frame order by default.
+        ascending (bool): Whether to sort in ascending order.
+        columns (list): The columns to return; all of them by default.
+        **predicates: Column name to a value or a list of accepted values.
+
+    Yields:
+        pandas.DataFrame: Consecutive pages; only one is materialized at a time. An empty
+        result yields one empty page, so consumers still see the columns.
+    """
+    positions = ordered(df, sort_by, ascending, **predicates)
+    frame = df if columns is None else df[columns]
+    for start in range(0, max(len(positions), 1), limit):
+        yield frame.take(positions[start:start + limit])
@@ -0,0 +1,161 @@
+import collections
+import functools
+import inspect
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from frame_cache import frame_version, slice_version
+from specs import FigureSpec
+
+# Default bounds of the shared cache
+MAX_BYTES = 256 * 1024 * 1024
+TTL_SECONDS = 60 * 60
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache bounded by total size in bytes, with a per-entry time to live.
+
+    Entries are looked up on every Streamlit rerun of every session, so the cache keeps
+    simple hit, miss and eviction counters to show whether it is paying off.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, ttl=TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return (True, value) for a live entry, otherwise (False, None).
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (value, size, time.monotonic())
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _value, size, _stored = self.entries.pop(key)
+        self.size -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: entries, bytes, hits, misses, evictions and hit_rate.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _sizeof(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, FigureSpec):
+        return sys.getsizeof(value.to_json())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _normalize(value):
+    # DataFrames are keyed on their version token, containers on their items
+    if isinstance(value, pd.DataFrame):
+        return ('frame', frame_version(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items()))
+    return value
+
+
+shared_cache = ResultCache()
+
+
+def memoize(func=None, *, cache=shared_cache, scope=None):
+    """
+    Cache the results of an analysis function in a ResultCache shared by all sessions.
+
+    The key is the function name plus its normalized arguments, where DataFrame
+    arguments stand for their dataset version. Results (DataFrames, FigureSpecs, ...)
+    are returned as-is and must not be mutated.
+
+    Functions that only read the rows of some keys (one country, one athlete) can
+    declare them in `scope`; their DataFrame then stands for the versions of those
+    slices only, so appending rows for other keys keeps their results valid.
+
+    Parameters:
+        func (callable): The function to wrap.
+        cache (ResultCache): The cache to store results in.
+        scope (dict): Parameter name to the column its value selects, e.g.
+            {'country': 'country_name'}. The function must take the frame as `df`.
+
+    Returns:
+        callable: The memoized function.
+    """
+    if func is None:
+        return functools.partial(memoize, cache=cache, scope=scope)
+    signature = inspect.signature(func) if scope else None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if scope:
+            arguments = signature.bind(*args, **kwargs).arguments
+            df = arguments['df']
+            versions = tuple(slice_version(df, column, arguments[name]) for name, column in scope.items())
+            arguments = {name: ('slices', versions) if name == 'df' else value for name, value in arguments.items()}
+            key = (func.__module__, func.__qualname__, _normalize(arguments))
+        else:
+            key = (func.__module__, func.__qualname__, _normalize(args), _normalize(kwargs))
+        found, value = cache.get(key)
+        if not found:
+            value = func(*args, **kwargs)
+            cache.put(key, value)
+        return value
+
+    wrapper.cache = cache
+    return wrapper
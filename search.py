@@ -0,0 +1,209 @@
+import bisect
+import copy
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import per_frame
+
+# Upper bound on prefix hits looked at per query, so one-letter prefixes stay cheap
+MAX_PREFIX_HITS = 200
+
+# Minimum trigram similarity for a fuzzy candidate
+MIN_SIMILARITY = 0.3
+
+
+def normalize(text):
+    """
+    Fold a name for matching: strip accents, case-fold and collapse whitespace.
+
+    Parameters:
+        text (str): The raw name or query.
+
+    Returns:
+        str: The normalized key.
+    """
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameSearch:
+    """
+    Ranked, typo-tolerant lookup over a fixed set of names and their aliases.
+
+    A sorted list of (word-start suffix, term id) pairs answers prefix queries on the
+    full name or on any of its words ("constan" finds "Stefania CONSTANTINI"), and
+    a trigram posting index answers fuzzy queries ("stefania konstantini"). Terms are
+    the names and their aliases ("USSR" for "Russian Federation"); a term matching a
+    query suggests the name it stands for.
+    """
+
+    def __init__(self, names, aliases=None):
+        self.names = []
+        self.keys = []
+        self.term_keys = []
+        self.term_names = np.zeros(0, dtype=np.int32)
+        self.prefix_entries = []
+        self.prefix_keys = []
+        self.trigram_counts = np.zeros(0, dtype=np.int32)
+        self.postings = {}
+        self._add(sorted({str(name) for name in names if pd.notna(name)}), aliases or {})
+
+    def _add(self, names, aliases):
+        # Every attribute is replaced rather than mutated, so copies made by extend() stay independent
+        name_ids = {name: name_id for name_id, name in enumerate(names, len(self.names))}
+        keys = [normalize(name) for name in names]
+        terms = list(zip(keys, name_ids.values()))
+        terms += [(normalize(alias), name_ids[name]) for alias, name in sorted(aliases.items()) if name in name_ids]
+        first = len(self.term_keys)
+
+        entries = []
+        for term_id, (key, _name_id) in enumerate(terms, first):
+            words = key.split(' ')
+            for start in range(len(words)):
+                entries.append((' '.join(words[start:]), term_id))
+        self.prefix_entries = sorted(self.prefix_entries + entries)
+        self.prefix_keys = [entry[0] for entry in self.prefix_entries]
+
+        postings = {}
+        counts = np.zeros(len(terms), dtype=np.int32)
+        for term_id, (key, _name_id) in enumerate(terms, first):
+            grams = trigrams(key)
+            counts[term_id - first] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(term_id)
+        self.postings = dict(self.postings)
+        for gram, ids in postings.items():
+            ids = np.array(ids, dtype=np.int32)
+            self.postings[gram] = np.concatenate([self.postings[gram], ids]) if gram in self.postings else ids
+        self.trigram_counts = np.concatenate([self.trigram_counts, counts])
+
+        self.names = self.names + names
+        self.keys = self.keys + keys
+        self.term_keys = self.term_keys + [key for key, _name_id in terms]
+        self.term_names = np.concatenate([self.term_names, np.array([name_id for _key, name_id in terms], dtype=np.int32)])
+
+    def extend(self, names, aliases=None):
+        """
+        Return a search over these names plus some more; this one is left unchanged.
+
+        Only the new names and their aliases are normalized and split into trigrams.
+
+        Parameters:
+            names (iterable): The names to add; known names and nulls are skipped.
+            aliases (dict): Alias to name; only the aliases of the new names are added.
+
+        Returns:
+            NameSearch: The grown search.
+        """
+        known = set(self.names)
+        search = copy.copy(self)
+        search._add(sorted({str(name) for name in names if pd.notna(name)} - known), aliases or {})
+        return search
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=10):
+        """
+        Return the names best matching a (possibly partial or misspelt) query.
+
+        Exact matches rank first, then prefix matches on the full name, then prefix
+        matches on a later word, then fuzzy matches by trigram similarity. A name
+        scores as its best matching term.
+
+        Parameters:
+            query (str): The text typed by the user.
+            limit (int): The maximum number of suggestions.
+
+        Returns:
+            list: Matching names, best first.
+        """
+        key = normalize(query)
+        if not key:
+            return []
+
+        term_scores = {}
+        start = bisect.bisect_left(self.prefix_keys, key)
+        for entry_key, term_id in self.prefix_entries[start:start + MAX_PREFIX_HITS]:
+            if not entry_key.startswith(key):
+                break
+            if self.term_keys[term_id] == key:
+                score = 3.0
+            elif self.term_keys[term_id] == entry_key:
+                score = 2.0
+            else:
+                score = 1.5
+            term_scores[term_id] = max(term_scores.get(term_id, 0.0), score)
+
+        grams = trigrams(key)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if hits:
+            shared = np.bincount(np.concatenate(hits), minlength=len(self.term_keys))
+            similarity = shared / (len(grams) + self.trigram_counts - shared)
+            candidates = np.flatnonzero(similarity >= MIN_SIMILARITY)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-similarity[candidates], limit)[:limit]]
+            for term_id in candidates:
+                term_scores[term_id] = term_scores.get(term_id, 0.0) + float(similarity[term_id])
+
+        scores = {}
+        for term_id, score in term_scores.items():
+            name_id = int(self.term_names[term_id])
+            scores[name_id] = max(scores.get(name_id, 0.0), score)
+
+        ranked = sorted(scores, key=lambda name_id: (-scores[name_id], len(self.keys[name_id]), self.names[name_id]))
+        return [self.names[name_id] for name_id in ranked[:limit]]
+
+
+def _distinct(column):
+    # Categoricals already hold their distinct values; other columns are deduplicated before dropping nulls
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.categories.to_numpy()
+    names = column.unique()
+    return names[pd.notna(names)]
+
+
+@per_frame
+def name_search(df):
+    """
+    Return the athlete and country search engines for a DataFrame, building them on first use.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+
+    Returns:
+        dict: 'athlete' and 'country' to their NameSearch; the country search also
+        matches the aliases of Dataset_prep.country_aliases().
+    """
+    # Imported here because Dataset_prep imports this module
+    from Dataset_prep import country_aliases
+
+    return {
+        # Streamed aggregates carry no athlete column
+        'athlete': NameSearch(_distinct(df['athlete_full_name']) if 'athlete_full_name' in df else []),
+        'country': NameSearch(_distinct(df['country_name']), country_aliases()),
+    }
+
+
+def suggest(df, kind, query, limit=10):
+    """
+    Return ranked suggestions for an athlete or country query.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the data.
+        kind (str): 'athlete' or 'country'.
+        query (str): The text typed by the user.
+        limit (int): The maximum number of suggestions.
+
+    Returns:
+        list: Matching names, best first.
+    """
+    return name_search(df)[kind].search(query, limit)
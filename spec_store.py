@@ -0,0 +1,108 @@
+"""
+On-disk store of precomputed figure specs, keyed by dataset version and code version.
+
+prerender.py fills the store for the most requested views. Spec functions
+decorated with @stored read their result from it before computing anything, so
+those views are served warm right after a deploy, before any session has paid for
+them. Entries of other dataset versions are never read, so a changed dataset simply
+misses until the job runs again. Entries also record SPEC_VERSION and a hash of the
+spec function's source, so a changed spec function misses too; bump SPEC_VERSION
+when a change elsewhere (a helper, the FigureSpec format) changes what specs hold.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+from frame_cache import frame_version
+from specs import FigureSpec
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'prerender')
+
+# Bump when stored specs change without their spec function's source changing
+SPEC_VERSION = 2
+
+
+@functools.cache
+def code_version(func):
+    """
+    Return a token for SPEC_VERSION and the source of a spec function.
+    """
+    source = inspect.getsource(func)
+    return f'{SPEC_VERSION}-{hashlib.sha256(source.encode()).hexdigest()[:16]}'
+
+
+def entry_path(version, func, arguments):
+    """
+    Return the file of a spec function's result for some arguments in a dataset version,
+    as computed by the current code.
+
+    Parameters:
+        version (str): The dataset version token.
+        func (callable): The undecorated spec function.
+        arguments (dict): Its arguments other than the frame.
+
+    Returns:
+        str: The path of the entry, which may not exist.
+    """
+    digest = hashlib.sha256(json.dumps(arguments, sort_keys=True).encode()).hexdigest()[:32]
+    return os.path.join(STORE_DIR, version, f'{func.__module__}.{func.__qualname__}', code_version(func), f'{digest}.json')
+
+
+def stored(func):
+    """
+    Serve a spec function from the store when its entry exists.
+
+    The function must take the frame as `df` and JSON-serializable other arguments.
+    The wrapper gains a prerender(df, ...) method that computes the spec and writes
+    its entry.
+    """
+    signature = inspect.signature(func)
+
+    def path_of(args, kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        df = arguments.pop('df')
+        return df, entry_path(frame_version(df), func, arguments)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _df, path = path_of(args, kwargs)
+        try:
+            with open(path) as file:
+                return FigureSpec.from_json(file.read())
+        except FileNotFoundError:
+            return func(*args, **kwargs)
+
+    def prerender(*args, **kwargs):
+        _df, path = path_of(args, kwargs)
+        spec = func(*args, **kwargs)
+
+        # Write to a temporary file first so the app never reads a partial entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.{os.getpid()}.tmp', 'w') as file:
+            file.write(spec.to_json())
+        os.replace(f'{path}.{os.getpid()}.tmp', path)
+        return path
+
+    wrapper.prerender = prerender
+    return wrapper
+
+
+def prune(version):
+    """
+    Delete the entries of every dataset version but one.
+
+    Parameters:
+        version (str): The dataset version to keep.
+
+    Returns:
+        list: The versions deleted.
+    """
+    if not os.path.isdir(STORE_DIR):
+        return []
+    stale = [name for name in os.listdir(STORE_DIR) if name != version]
+    for name in stale:
+        shutil.rmtree(os.path.join(STORE_DIR, name), ignore_errors=True)
+    return stale
@@ -0,0 +1,102 @@
+"""
+Serializable figure specs and the renderer that turns them into Plotly figures.
+
+The analysis modules compute a FigureSpec from the data: plain lists and dicts
+describing the traces, the layout and, for animated charts, one value per slug game
+and trace. Only render() touches Plotly, so specs can be cached, shipped as JSON or
+precomputed offline, and the expanded animation frames are only built when a
+figure is actually drawn.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from animation import bar_frames, slider
+
+# Trace 'type' -> Plotly trace class
+TRACE_TYPES = {
+    'bar': go.Bar,
+    'scatter': go.Scatter,
+    'heatmap': go.Heatmap,
+    'choropleth': go.Choropleth,
+}
+
+
+def plain(value):
+    """
+    Convert numpy arrays, pandas objects and numpy scalars inside a value to JSON-ready
+    lists and Python scalars; missing floats become None.
+    """
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index, pd.Series, pd.api.extensions.ExtensionArray)):
+        return [plain(item) for item in list(value)]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class FigureSpec:
+    """
+    A figure as plain data.
+
+    Attributes:
+        traces (list): One dict per trace: its 'type' (a TRACE_TYPES key) and properties.
+        layout (dict): The layout properties.
+        animation (dict): For charts stepping through slug games, 'labels' (one per
+            frame) and 'traces' ([values, properties] pairs, one value per label), as
+            taken by animation.bar_frames; None for static charts.
+    """
+
+    def __init__(self, traces=None, layout=None, animation=None):
+        self.traces = plain(traces or [])
+        self.layout = plain(layout or {})
+        self.animation = plain(animation)
+
+    def to_dict(self):
+        return {'traces': self.traces, 'layout': self.layout, 'animation': self.animation}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('traces'), data.get('layout'), data.get('animation'))
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def __eq__(self, other):
+        return isinstance(other, FigureSpec) and self.to_dict() == other.to_dict()
+
+
+def render(spec, frames=True):
+    """
+    Build the Plotly figure of a spec.
+
+    Parameters:
+        spec (FigureSpec): The spec to draw.
+        frames (bool): Whether to add the slider and animation frames of animated specs.
+
+    Returns:
+        plotly.graph_objects.Figure: The interactive figure.
+    """
+    fig = go.Figure()
+    for trace in spec.traces:
+        properties = dict(trace)
+        fig.add_trace(TRACE_TYPES[properties.pop('type')](**properties))
+    fig.update_layout(**spec.layout)
+
+    if frames and spec.animation is not None:
+        # Add a slider
+        fig.update_layout(sliders=[slider(spec.animation['labels'])])
+
+        # Add frames for each slug game
+        fig.frames = bar_frames(spec.animation['labels'], spec.animation['traces'])
+
+    return fig
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import Dataset_prep as dap  # noqa: E402
+
+SOURCE_PATH = os.path.join(ROOT, 'medals.csv')
+
+
+@pytest.fixture(scope='session')
+def raw():
+    """The medals rows as read from the source CSV; tests must not modify them."""
+    return pd.read_csv(SOURCE_PATH)
+
+
+@pytest.fixture(scope='session')
+def df(raw):
+    """The prepared medals frame; tests must not modify it."""
+    return dap.prepare(raw)
+
+
+@pytest.fixture(scope='session')
+def plain(df):
+    """The prepared frame with plain object columns, as the pages read it before encoding."""
+    return df.astype({column: object for column in dap.CATEGORICAL_COLUMNS})
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import Dataset_prep as dap
+import country_analysis as ca
+import medal_analysis as ma
+from aggregates import CUBE_DIMENSIONS, MedalCube, medal_cube
+from conftest import SOURCE_PATH
+
+COUNTRIES = ['France', 'United States of America', 'Russian Federation', 'Kenya']
+DISCIPLINES = ['Athletics', 'Swimming', 'Fencing']
+
+
+def counts(series):
+    return {key: int(value) for key, value in series.items() if value}
+
+
+def cube_counts(cube):
+    return counts(cube.rollup(*CUBE_DIMENSIONS))
+
+
+@pytest.mark.parametrize('dimensions', [('country_name',), ('country_name', 'medal_type'), ('slug_game', 'discipline_title', 'event_gender')])
+def test_rollup_matches_groupby(df, plain, dimensions):
+    expected = plain.groupby(list(dimensions)).size()
+    assert counts(medal_cube(df).rollup(*dimensions)) == counts(expected)
+
+
+def test_rollup_filters_and_total(df, plain):
+    rows = plain[(plain['country_name'] == 'France') & plain['discipline_title'].isin(DISCIPLINES)]
+    rollup = medal_cube(df).rollup('slug_game', 'medal_type', country_name='France', discipline_title=DISCIPLINES)
+    assert counts(rollup) == counts(rows.groupby(['slug_game', 'medal_type']).size())
+    assert medal_cube(df).rollup(country_name='France') == (plain['country_name'] == 'France').sum()
+    assert medal_cube(df).total == len(df)
+
+
+def test_combine_of_chunks_equals_full_cube(raw, df):
+    # Chunks prepared on their own have different categories
+    bounds = [0, 5000, 12000, len(raw)]
+    chunks = [MedalCube.from_frame(dap.prepare(raw.iloc[start:stop])) for start, stop in zip(bounds, bounds[1:])]
+    combined = MedalCube.combine(chunks)
+    full = MedalCube.from_frame(df)
+    assert combined.total == full.total
+    assert cube_counts(combined) == cube_counts(full)
+    assert {dimension: list(combined.categories[dimension]) for dimension in CUBE_DIMENSIONS} == \
+        {dimension: list(full.categories[dimension]) for dimension in CUBE_DIMENSIONS}
+
+
+def test_streamed_cube_equals_full_cube(df):
+    summary = dap.stream_dataset(SOURCE_PATH, chunksize=4000)
+    assert medal_cube(summary).total == len(df)
+    assert cube_counts(medal_cube(summary)) == cube_counts(medal_cube(df))
+    assert dap.merged_countries(summary) == dap.merged_countries(df)
+
+
+# The original implementations of the pages, on plain columns
+def baseline_most_participated_sport(df, country):
+    return df.groupby(['country_name', 'discipline_title']).size().unstack(fill_value=0).loc[country].idxmax()
+
+
+def baseline_total_medals(df, country, discipline):
+    rows = df[(df['country_name'] == country) & (df['discipline_title'] == discipline)]
+    return rows.groupby('slug_game')['medal_type'].count()
+
+
+def baseline_medals_by_type(df, country, discipline):
+    rows = df[(df['country_name'] == country) & (df['discipline_title'] == discipline)]
+    return rows.groupby('slug_game')['medal_type'].value_counts().unstack(fill_value=0)
+
+
+@pytest.mark.parametrize('country', COUNTRIES)
+def test_country_pages_match_baseline(df, plain, country):
+    assert ca.determine_most_participated_sport(df, country) == baseline_most_participated_sport(plain, country)
+    for discipline in DISCIPLINES:
+        total = ca.track_country_performance(df, country, discipline)
+        assert dict(zip(total['slug_game'].astype(str), total['total_medals'])) == counts(baseline_total_medals(plain, country, discipline))
+
+        by_type = ma.track_country_performance(df, country, discipline)
+        expected = baseline_medals_by_type(plain, country, discipline)
+        assert counts(by_type.stack()) == (counts(expected.stack()) if len(expected) else {})
+        assert np.array_equal(by_type.index.astype(str), expected.index.astype(str))
+
+
+def test_compare_same_country_twice(df):
+    spec = ma.compare_many_spec(df, ['France', 'France'], ['Fencing'])
+    assert spec == ma.compare_many_spec(df, ['France'], ['Fencing'])
+    assert len(ma.compare_plot_figure(df, 'France', 'France', 'Fencing').data) == 1
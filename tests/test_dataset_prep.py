@@ -0,0 +1,98 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Dataset_prep as dap
+from aggregates import CUBE_DIMENSIONS, medal_cube
+from conftest import SOURCE_PATH
+from frame_cache import frame_version, slice_version
+from indexes import INDEX_KEYS, row_indexes
+from search import name_search
+
+
+def test_harmonize_countries():
+    column = pd.Series(['USSR', 'France', None, 'Soviet Union', 'Russian Federation', 'ROC'], name='country_name')
+    harmonized, merged = dap.harmonize_countries(column)
+    assert harmonized.tolist()[:2] == ['Russian Federation', 'France']
+    assert pd.isna(harmonized[2])
+    assert harmonized.tolist()[3:] == ['Russian Federation'] * 3
+    assert list(harmonized.cat.categories) == ['France', 'Russian Federation']
+    assert merged == {'Russian Federation': ['ROC', 'Soviet Union', 'USSR']}
+
+
+def test_harmonized_frame_has_no_aliases(df):
+    assert not set(df['country_name'].cat.categories) & set(dap.country_aliases())
+
+
+def split_games(raw, count=3):
+    new = raw['slug_game'].isin(raw['slug_game'].unique()[:count])
+    return raw[~new].reset_index(drop=True), raw[new].reset_index(drop=True)
+
+
+def assert_same_frame(result, expected):
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+    assert medal_cube(result).rollup(*CUBE_DIMENSIONS).to_dict() == medal_cube(expected).rollup(*CUBE_DIMENSIONS).to_dict()
+    for name in INDEX_KEYS:
+        assert np.array_equal(row_indexes(result)[name].positions_by_key, row_indexes(expected)[name].positions_by_key)
+    for kind, search in name_search(expected).items():
+        assert sorted(name_search(result)[kind].names) == search.names
+    assert dap.merged_countries(result) == dap.merged_countries(expected)
+
+
+def test_append_frame_equals_fresh_load(raw):
+    old_rows, new_rows = split_games(raw)
+    old = dap.prepare(old_rows)
+    # Built search indexes are extended rather than rebuilt
+    name_search(old)
+    combined = dap.append_frame(old, new_rows)
+    assert name_search.cached(combined) is not None
+    assert_same_frame(combined, dap.prepare(pd.concat([old_rows, new_rows], ignore_index=True)))
+
+
+def test_append_frame_rejects_loaded_games(raw, df):
+    with pytest.raises(ValueError, match='already loaded'):
+        dap.append_frame(df, raw[raw['slug_game'] == 'tokyo-2020'])
+
+
+def test_append_frame_keeps_untouched_slice_versions(raw):
+    old_rows, new_rows = split_games(raw)
+    old = dap.prepare(old_rows)
+    combined = dap.append_frame(old, new_rows)
+    assert frame_version(combined) != frame_version(old)
+
+    touched = new_rows['country_name'].iloc[0]
+    untouched = sorted(set(old_rows['country_name']) - set(new_rows['country_name']))[0]
+    assert slice_version(combined, 'country_name', touched) == frame_version(combined)
+    assert slice_version(combined, 'country_name', untouched) == slice_version(old, 'country_name', untouched)
+    assert slice_version(combined, 'slug_game', new_rows['slug_game'].iloc[0]) == frame_version(combined)
+
+
+def test_append_games_updates_the_cache(raw, tmp_path, monkeypatch):
+    old_rows, new_rows = split_games(raw)
+    path = str(tmp_path / 'medals.csv')
+    old_rows.to_csv(path, index=False)
+    monkeypatch.setattr(dap, 'SOURCE_PATH', path)
+    monkeypatch.setattr(dap, '_df', dap.load_dataset(path))
+
+    for _game, rows in new_rows.groupby('slug_game', sort=False):
+        combined = dap.append_games(rows.reset_index(drop=True))
+
+    fresh = dap.load_dataset(path, use_cache=False)
+    cached = dap.load_dataset(path)
+    assert_same_frame(combined, fresh)
+    assert_same_frame(cached, fresh)
+    assert frame_version(cached) == frame_version(combined)
+    assert len(os.listdir(tmp_path / dap.CACHE_DIR)) == 2 + new_rows['slug_game'].nunique()
+
+
+def test_cache_survives_a_touched_source(tmp_path):
+    path = str(tmp_path / 'medals.csv')
+    shutil.copy(SOURCE_PATH, path)
+    loaded = dap.load_dataset(path)
+    os.utime(path, (0, 0))
+    reloaded = dap.load_dataset(path)
+    pd.testing.assert_frame_equal(reloaded, loaded)
+    assert frame_version(reloaded) == frame_version(loaded)
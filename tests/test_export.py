@@ -0,0 +1,74 @@
+import io
+
+import pandas as pd
+import pytest
+
+from export import LIST_SEPARATOR, frame_chunks, head_chunks, query_chunks, write
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet as pq  # noqa: E402
+
+
+def read(file, fmt):
+    file.seek(0)
+    if fmt == 'csv':
+        return pd.read_csv(file)
+    if fmt == 'parquet':
+        return pq.read_table(file).to_pandas()
+    return pa.ipc.open_file(file).read_all().to_pandas()
+
+
+@pytest.fixture
+def table():
+    # A ranking-like table: a categorical column and a column of tuples
+    return pd.DataFrame({
+        'country_name': pd.Categorical(['France', 'Kenya', 'France', None, 'Italy'], categories=['France', 'Italy', 'Kenya']),
+        'medals': [3, 1, 2, 0, 5],
+        'led_disciplines': [('Fencing', 'Judo'), ('Athletics',), (), None, ['Fencing']],
+    })
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_round_trip_keeps_categoricals_and_lists(table, fmt):
+    file = io.BytesIO()
+    write(frame_chunks(table, chunk_rows=2), file, fmt)
+    result = read(file, fmt)
+
+    assert isinstance(result['country_name'].dtype, pd.CategoricalDtype)
+    assert list(result['country_name'].cat.categories) == ['France', 'Italy', 'Kenya']
+    assert result['country_name'].tolist()[:3] == ['France', 'Kenya', 'France']
+    assert pd.isna(result['country_name'][3])
+    assert result['medals'].tolist() == table['medals'].tolist()
+    assert [None if value is None else list(value) for value in result['led_disciplines']] == \
+        [None if value is None else list(value) for value in table['led_disciplines']]
+
+
+def test_csv_round_trip_joins_lists(table):
+    file = io.BytesIO()
+    write(frame_chunks(table, chunk_rows=2), file, 'csv')
+    result = read(file, 'csv')
+
+    assert result.columns.tolist() == table.columns.tolist()
+    assert result['country_name'].tolist()[:3] == ['France', 'Kenya', 'France']
+    assert result['medals'].tolist() == table['medals'].tolist()
+    assert result['led_disciplines'].tolist()[:2] == [LIST_SEPARATOR.join(['Fencing', 'Judo']), 'Athletics']
+    assert result['led_disciplines'].tolist()[4] == 'Fencing'
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'arrow'])
+def test_query_export_matches_query(df, fmt):
+    columns = ['slug_game', 'country_name', 'athlete_full_name', 'medal_type']
+    expected = df.loc[df['discipline_title'] == 'Fencing', columns].reset_index(drop=True)
+    file = io.BytesIO()
+    write(query_chunks(df, columns=columns, chunk_rows=500, discipline_title='Fencing'), file, fmt)
+    result = read(file, fmt)
+
+    assert len(result) == len(expected)
+    for column in columns:
+        assert result[column].astype(object).where(result[column].notna(), None).tolist() == \
+            expected[column].astype(object).where(expected[column].notna(), None).tolist()
+
+
+def test_head_chunks_cuts_the_last_chunk(table):
+    chunks = list(head_chunks(frame_chunks(table, chunk_rows=2), 3))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import Dataset_prep as dap
+from indexes import INDEX_KEYS, RowIndex, row_indexes
+from query import MAX_ORDERS, _orders, ordered, page, where
+
+
+def mask_positions(df, **values):
+    mask = np.ones(len(df), dtype=bool)
+    for column, accepted in values.items():
+        accepted = accepted if isinstance(accepted, list) else [accepted]
+        mask &= df[column].isin(accepted).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize('name', list(INDEX_KEYS))
+def test_positions_match_masks(df, name):
+    index = row_indexes(df)[name]
+    columns = INDEX_KEYS[name]
+    keys = df[list(columns)].dropna().drop_duplicates().sample(50, random_state=0, replace=True)
+    for key in keys.itertuples(index=False):
+        assert np.array_equal(index.positions(*key), mask_positions(df, **dict(zip(columns, key))))
+    assert len(index.positions(*(['Nowhere'] * len(columns)))) == 0
+
+
+@pytest.mark.parametrize('name', list(INDEX_KEYS))
+def test_extend_equals_fresh_index(raw, name):
+    # The appended Games bring new athletes, events and slug games
+    new = raw['slug_game'].isin(raw['slug_game'].unique()[:4])
+    head = dap.prepare(raw[~new].reset_index(drop=True))
+    tail = dap.prepare(raw[new].reset_index(drop=True))
+    full = dap.prepare(pd.concat([raw[~new], raw[new]], ignore_index=True))
+
+    columns = INDEX_KEYS[name]
+    extended = RowIndex.from_frame(head, columns).extend(tail, len(head))
+    fresh = RowIndex.from_frame(full, columns)
+    assert [list(labels) for labels in extended.labels] == [list(labels) for labels in fresh.labels]
+    assert np.array_equal(extended.sorted_keys, fresh.sorted_keys)
+    assert np.array_equal(extended.positions_by_key, fresh.positions_by_key)
+
+
+def test_where_matches_masks(df):
+    cases = [
+        {'country_name': 'France'},
+        {'country_name': ['France', 'Germany'], 'discipline_title': 'Fencing'},
+        {'country_name': 'Kenya', 'medal_type': ['GOLD', 'SILVER'], 'event_gender': 'Women'},
+        {'slug_game': 'tokyo-2020', 'participant_type': 'GameTeam'},
+        {'medal_type': 'GOLD'},
+        {'country_name': 'Nowhere'},
+        {'medal_type': 'TIN'},
+    ]
+    for predicates in cases:
+        assert np.array_equal(where(df, **predicates), mask_positions(df, **predicates)), predicates
+    assert np.array_equal(where(df), np.arange(len(df)))
+
+
+@pytest.mark.parametrize('sort_by', [None, 'country_name', 'athlete_full_name'])
+@pytest.mark.parametrize('ascending', [True, False])
+def test_ordered_matches_sort_values(df, plain, sort_by, ascending):
+    positions = ordered(df, sort_by, ascending, discipline_title='Fencing')
+    rows = plain.reset_index(drop=True)
+    expected = rows[rows['discipline_title'] == 'Fencing']
+    if sort_by is not None:
+        expected = expected.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+    assert positions.tolist() == expected.index.tolist()
+
+
+def test_pages_slice_the_order(df):
+    positions = ordered(df, 'athlete_full_name', country_name='France')
+    seen = []
+    for offset in range(0, len(positions), 250):
+        rows, total = page(df, offset, 250, 'athlete_full_name', columns=['athlete_full_name'], country_name='France')
+        assert total == len(positions)
+        assert list(rows.columns) == ['athlete_full_name']
+        seen.extend(rows.index)
+    assert seen == df.index[positions].tolist()
+    assert page(df, len(positions), 250, 'athlete_full_name', country_name='France')[0].empty
+
+
+def test_orders_are_kept_per_frame_least_recently_used_first(raw):
+    # A frame of its own, so other tests' orders do not count
+    df = dap.prepare(raw.head(1000))
+    first = ordered(df, 'athlete_full_name')
+    for value in range(MAX_ORDERS - 1):
+        ordered(df, 'athlete_full_name', medal_type=f'unknown-{value}')
+    assert ordered(df, 'athlete_full_name') is first
+
+    # The first order was used last, so the next new order drops the oldest other one
+    ordered(df, 'country_name')
+    orders = _orders(df)
+    assert len(orders) == MAX_ORDERS
+    assert ('athlete_full_name', True, ()) in orders
+    assert ('athlete_full_name', True, (('medal_type', ('unknown-0',)),)) not in orders
@@ -0,0 +1,95 @@
+import sys
+
+import pytest
+
+import Dataset_prep as dap
+import result_cache
+from result_cache import ResultCache, memoize
+
+
+def entry(size):
+    # A value _sizeof measures as exactly `size` bytes
+    return b'x' * (size - sys.getsizeof(b''))
+
+
+def test_evicts_least_recently_used_first():
+    cache = ResultCache(max_bytes=300)
+    for key in 'abc':
+        cache.put(key, entry(100))
+    assert cache.get('a') == (True, entry(100))
+
+    cache.put('d', entry(100))
+    assert list(cache.entries) == ['c', 'a', 'd']
+    assert cache.get('b') == (False, None)
+
+    cache.put('e', entry(200))
+    assert list(cache.entries) == ['d', 'e']
+    assert cache.stats()['evictions'] == 3
+    assert cache.size == 300
+
+
+def test_entry_larger_than_cache_is_not_stored():
+    cache = ResultCache(max_bytes=300)
+    cache.put('a', entry(100))
+    cache.put('b', entry(400))
+    assert list(cache.entries) == ['a']
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    cache = ResultCache(ttl=60)
+    cache.put('a', 1)
+
+    now[0] += 60
+    assert cache.get('a') == (True, 1)
+    now[0] += 1
+    assert cache.get('a') == (False, None)
+    assert not cache.entries and cache.size == 0
+
+
+@pytest.fixture(scope='module')
+def appended(raw):
+    # Append one country's rows of one Games, so every other country's slice is untouched
+    game = raw.loc[raw['country_name'] == 'Kenya', 'slug_game'].iloc[0]
+    rows = raw[(raw['slug_game'] == game) & (raw['country_name'] == 'Kenya')]
+    old = dap.prepare(raw[raw['slug_game'] != game].reset_index(drop=True))
+    return old, dap.append_frame(old, rows)
+
+
+def scoped_counter():
+    calls = []
+
+    @memoize(cache=ResultCache(), scope={'country': 'country_name'})
+    def medals(df, country):
+        calls.append(country)
+        return int((df['country_name'] == country).sum())
+
+    return medals, calls
+
+
+def test_scoped_entries_survive_appends_to_other_countries(appended):
+    old, new = appended
+    medals, calls = scoped_counter()
+    assert medals(old, 'France') == medals(new, 'France')
+    assert calls == ['France']
+
+
+def test_scoped_entries_invalidate_on_appends_to_their_country(appended):
+    old, new = appended
+    medals, calls = scoped_counter()
+    assert medals(new, 'Kenya') > medals(old, 'Kenya')
+    assert calls == ['Kenya', 'Kenya']
+
+
+def test_unscoped_entries_invalidate_on_any_append(appended):
+    old, new = appended
+    calls = []
+
+    @memoize(cache=ResultCache())
+    def rows(df):
+        calls.append(None)
+        return len(df)
+
+    assert rows(new) > rows(old)
+    assert len(calls) == 2